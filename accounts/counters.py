@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+from sqlalchemy import delete, func, insert, select
+
+from extensions import db
+from accounts.models import DashboardCounters, Task
+from grievances.models import Grievance
+from payslips.models import Notification
+
+
+def rebuild_dashboard_counters():
+    """
+    Recomputes every dashboard_counters row from the source tables, e.g.
+    after a manual data fix. Returns the number of rows written.
+    """
+    rows = defaultdict(lambda: {"pending_tasks": 0, "open_grievances": 0, "unread_notifications": 0})
+
+    for user_id, n in db.session.execute(
+        select(Task.user_id, func.count()).where(Task.status == "Pending").group_by(Task.user_id)
+    ):
+        rows[user_id]["pending_tasks"] = n
+
+    for user_id, n in db.session.execute(
+        select(Grievance.user_id, func.count())
+        .where(Grievance.status == "Open", Grievance.user_id.isnot(None))
+        .group_by(Grievance.user_id)
+    ):
+        rows[user_id]["open_grievances"] = n
+
+    for user_id, n in db.session.execute(
+        select(Notification.user_id, func.count())
+        .where(Notification.is_read.is_(False), Notification.user_id.isnot(None))
+        .group_by(Notification.user_id)
+    ):
+        rows[user_id]["unread_notifications"] = n
+
+    db.session.execute(delete(DashboardCounters))
+    if rows:
+        db.session.execute(insert(DashboardCounters), [{"user_id": user_id, **values} for user_id, values in rows.items()])
+    db.session.commit()
+    return len(rows)
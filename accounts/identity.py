@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import select
+
+from extensions import db
+from accounts.models import User
+
+
+class CachedUser(UserMixin):
+    """
+    What Flask-Login keeps as current_user: just the identity, role and
+    active flag. Views that need the full row still load the User model.
+    """
+
+    def __init__(self, id, email, role, active):
+        self.id = id
+        self.email = email
+        self.role = role
+        self._active = active
+
+    @property
+    def is_active(self):
+        return self._active
+
+    def to_tuple(self):
+        return self.id, self.email, self.role, self._active
+
+    def __repr__(self):
+        return f"<CachedUser {self.email} ({self.role})>"
+
+
+class RedisIdentityStore:
+    """Optional shared tier so every worker sees the same entries and invalidations."""
+
+    def __init__(self, url, ttl, prefix="user-identity:"):
+        import redis  # Optional dependency: only needed when USER_CACHE_URL is set
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, user_id):
+        raw = self.client.get(f"{self.prefix}{user_id}")
+        return tuple(json.loads(raw)) if raw else None
+
+    def set(self, user_id, identity):
+        self.client.set(f"{self.prefix}{user_id}", json.dumps(identity), ex=self.ttl)
+
+    def delete(self, user_id):
+        self.client.delete(f"{self.prefix}{user_id}")
+
+
+class UserIdentityCache:
+    """
+    Per-process TTL cache of (id, email, role, is_active) consulted by the
+    Flask-Login user loader, so authenticated requests stop paying a users
+    table round trip each. Entries expire after `ttl` seconds; invalidate()
+    drops one immediately after the row changes. A shared store (Redis), when
+    configured, sits between the local LRU and the database.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000, shared=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.shared = shared
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def load(self, user_id):
+        """CachedUser for an active account, or None (unknown or deactivated) so Flask-Login logs it out."""
+        identity = self._lookup(user_id)
+        if identity is None or not identity[3]:
+            return None
+        return CachedUser(*identity)
+
+    def _lookup(self, user_id):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                identity, stored_at = entry
+                if now - stored_at < self.ttl:
+                    self._entries.move_to_end(user_id)
+                    self.memory_hits += 1
+                    return identity
+                del self._entries[user_id]
+
+        if self.shared is not None:
+            try:
+                identity = self.shared.get(user_id)
+            except Exception as e:
+                print(f"User cache backend error: {e}")
+                identity = None
+            if identity is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                    self._remember(user_id, identity, now)
+                return identity
+
+        row = db.session.execute(
+            select(User.id, User.email, User.role, User.is_active).where(User.id == user_id)
+        ).first()
+        with self._lock:
+            self.misses += 1
+        if row is None:
+            return None
+
+        identity = (row.id, row.email, row.role, bool(row.is_active))
+        with self._lock:
+            self._remember(user_id, identity, now)
+        if self.shared is not None:
+            try:
+                self.shared.set(user_id, identity)
+            except Exception as e:
+                print(f"User cache backend error: {e}")
+        return identity
+
+    def invalidate(self, user_id):
+        """Call after committing a change to the user's role, active flag or password."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+        if self.shared is not None:
+            try:
+                self.shared.delete(user_id)
+            except Exception as e:
+                print(f"User cache backend error: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.shared_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.memory_hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "ttl": self.ttl,
+                "shared_backend": self.shared is not None,
+            }
+
+    def _remember(self, user_id, identity, stored_at):
+        # Caller holds self._lock
+        self._entries[user_id] = (identity, stored_at)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    """Returns the per-process cache, built from app config on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                ttl = config.get("USER_CACHE_TTL", 60)
+                url = config.get("USER_CACHE_URL")
+                _cache = UserIdentityCache(
+                    ttl=ttl,
+                    max_entries=config.get("USER_CACHE_SIZE", 10000),
+                    shared=RedisIdentityStore(url, ttl) if url else None,
+                )
+    return _cache
+
+
+def invalidate_user(user_id):
+    get_user_cache().invalidate(user_id)
@@ -1,4 +1,5 @@
 from extensions import db
+from db_utils import RollupMixin
 from datetime import datetime
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -118,4 +119,27 @@ class LeaveRequest(db.Model):
     days_requested = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(20), default="Approved") # Pending, Approved, Rejected
     reason = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# =========================
+# DASHBOARD COUNTERS MODEL
+# =========================
+class DashboardCounters(RollupMixin, db.Model):
+    """
+    One row per user behind accounts.dashboard, moved by the write paths in
+    grievances and Notification in the same transaction as the change
+    itself. rebuild_dashboard_counters.py recomputes every row. Leave
+    balances live in the leave ledger (leaves.models.LeaveBalance).
+    """
+    __tablename__ = "dashboard_counters"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    pending_tasks = db.Column(db.Integer, nullable=False, default=0)
+    open_grievances = db.Column(db.Integer, nullable=False, default=0)
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bump(cls, user_id, **deltas):
+        # Legacy grievances whose email matched no user have no owner to count against
+        if user_id is not None:
+            cls._bump({"user_id": user_id}, deltas)
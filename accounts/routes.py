@@ -1,12 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify
 from extensions import db
-from accounts.models import User, EmployeeProfile, Task, LeaveRequest
+from accounts.models import User, EmployeeProfile, DashboardCounters
 from accounts.decorators import login_required, role_required
+from accounts.identity import get_user_cache, invalidate_user
+from leaves.ledger import available_days
 from attendance.models import Attendance
-from sqlalchemy import func
+from payslips.models import Notification
+from attendance.geofence import geofence_enforced
+from sqlalchemy import and_, select
 from extensions import mail
 from itsdangerous import URLSafeTimedSerializer
-from werkzeug.security import generate_password_hash
 from flask_mail import Message
 import secrets
 import os
@@ -19,6 +22,7 @@ IST = pytz.timezone('Asia/Kolkata')
 
 accounts_bp = Blueprint("accounts", __name__, url_prefix="/accounts")
 UPLOAD_FOLDER = "static/uploads/profile"
+NOTIFICATIONS_SHOWN = 50
 
 @accounts_bp.route("/register", methods=["GET", "POST"])
 def register():
@@ -83,8 +87,26 @@ def logout():
 def dashboard():
     user_id = session.get("user_id")
     
+    # One round trip: the open shift (if any), the counters row and this year's leave ledger total
+    this_year = datetime.now(IST).year
+    stats = db.session.execute(
+        select(
+            Attendance.clock_in,
+            DashboardCounters.pending_tasks,
+            DashboardCounters.open_grievances,
+            DashboardCounters.unread_notifications,
+            available_days(user_id, this_year).label("leave_available"),
+        )
+        .select_from(User)
+        .outerjoin(DashboardCounters, DashboardCounters.user_id == User.id)
+        .outerjoin(Attendance, and_(Attendance.user_id == User.id, Attendance.clock_out.is_(None)))
+        .where(User.id == user_id)
+        .order_by(Attendance.date.desc())
+        .limit(1)
+    ).first()
+
     # --- 1. Your Existing Time Tracking Logic ---
-    active_log = Attendance.query.filter_by(user_id=user_id, clock_out=None).first()
+    active_log = stats if stats and stats.clock_in else None
     display_duration = "00:00:00"
     
     if active_log and active_log.clock_in:
@@ -103,42 +125,47 @@ def dashboard():
         display_duration = f"{h:02}:{m:02}:{s:02}"
 
     # --- 2. New Dynamic Stats Logic ---
-    
-    # Get Pending Tasks Count
-    pending_count = Task.query.filter_by(user_id=user_id, status='Pending').count()
+    pending_count = (stats.pending_tasks if stats else None) or 0
 
-    # Calculate Leave Balance (Annual Quota of 24 - Approved Leaves)
-    annual_quota = 24
-    used_leaves = db.session.query(func.sum(LeaveRequest.days_requested)).filter(
-        LeaveRequest.user_id == user_id,
-        LeaveRequest.status == 'Approved'
-    ).scalar() or 0
-    leave_balance = annual_quota - used_leaves
+    # Leave Balance straight from the ledger (quota minus approved days, per leave type)
+    leave_balance = f"{stats.leave_available:g}" if stats else 0
 
     return render_template(
         "accounts/dashboard.html", 
         active_log=active_log, 
         display_duration=display_duration,
         pending_count=pending_count,
-        leave_balance=leave_balance
+        leave_balance=leave_balance,
+        open_grievances=(stats.open_grievances if stats else None) or 0,
+        unread_notifications=(stats.unread_notifications if stats else None) or 0
     )
 
+@accounts_bp.route("/notifications")
+@login_required
+def notifications():
+    """The user's latest notifications; opening the page marks them all read."""
+    user_id = session.get("user_id")
+    items = (Notification.query.filter_by(user_id=user_id)
+             .order_by(Notification.id.desc()).limit(NOTIFICATIONS_SHOWN).all())
+    # Rendered before marking, so this visit still highlights what was new
+    page = render_template("accounts/notifications.html", notifications=items)
+    Notification.mark_all_read(user_id)
+    db.session.commit()
+    return page
+
 @accounts_bp.route('/clock-in', methods=['POST'])
 @login_required
 def clock_in():
     user_id = session.get("user_id")
-    today = datetime.now().date()
+    now_ist = datetime.now(IST)
+
+    # No coordinates on this form, so it cannot pass a geofence check
+    if geofence_enforced():
+        flash("Location access is required to clock in.", "rose")
+        return redirect(url_for('accounts.dashboard'))
     
-    # Safety check: Prevent double clock-in
-    existing = Attendance.query.filter_by(user_id=user_id, date=today, clock_out=None).first()
-    if not existing:
-        new_log = Attendance(
-            user_id=user_id,
-            date=today,
-            clock_in=datetime.now().time()
-        )
-        db.session.add(new_log)
-        db.session.commit()
+    # Atomic insert: a double-submit cannot create a second shift
+    if Attendance.start_shift(user_id, now_ist.date(), now_ist):
         flash("Shift started! Have a productive day.", "success")
     return redirect(url_for('accounts.dashboard'))
 
@@ -146,19 +173,9 @@ def clock_in():
 @login_required
 def clock_out():
     user_id = session.get("user_id")
-    today = datetime.now().date()
+    now_ist = datetime.now(IST)
     
-    log = Attendance.query.filter_by(user_id=user_id, date=today, clock_out=None).first()
-    if log:
-        log.clock_out = datetime.now().time()
-        
-        # Calculate Total Hours (Decimal)
-        start_dt = datetime.combine(today, log.clock_in)
-        end_dt = datetime.combine(today, log.clock_out)
-        duration = end_dt - start_dt
-        log.total_hours = round(duration.total_seconds() / 3600, 2)
-        
-        db.session.commit()
+    if Attendance.end_shift(user_id, now_ist.date(), now_ist):
         flash("Shift ended successfully.", "info")
     return redirect(url_for('accounts.dashboard'))
 
@@ -266,10 +283,18 @@ def toggle_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = not user.is_active  
     db.session.commit()
+    invalidate_user(user.id)
     status = "activated" if user.is_active else "deactivated"
     flash(f"User {user.email} has been {status}.", "success")
     return redirect(url_for('accounts.employee_list'))
 
+@accounts_bp.route('/hr/user-cache-stats')
+@login_required
+@role_required('hr')
+def user_cache_stats():
+    """Hit/miss counters for this worker's user identity cache."""
+    return jsonify(get_user_cache().stats())
+
 @accounts_bp.route("/forgot-password", methods=['GET', 'POST'])
 def forgot_password():
     if request.method == 'POST':
@@ -327,8 +352,9 @@ def reset_token(token):
 
         user = User.query.filter_by(email=email).first()
         if user:
-            user.password = generate_password_hash(password)
+            user.set_password(password)
             db.session.commit()
+            invalidate_user(user.id)
             flash('Your password has been updated!', 'success')
             return redirect(url_for('accounts.login'))
 
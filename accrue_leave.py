@@ -0,0 +1,49 @@
+import argparse
+from datetime import datetime
+
+import pytz
+
+from app import app
+from leaves.accrual import run_accrual
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+def last_closed_month():
+    today = datetime.now(IST).date()
+    return (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+
+# Monthly leave credit for every active employee; re-running a month credits nothing twice
+if __name__ == "__main__":
+    year, month = last_closed_month()
+    parser = argparse.ArgumentParser(description="Credit monthly leave accrual into the leave ledger.")
+    parser.add_argument("--year", type=int, default=year)
+    parser.add_argument("--month", type=int, default=month, help="credit up to and including this month (default: last closed month)")
+    parser.add_argument("--dry-run", action="store_true", help="print the changes without writing them")
+    parser.add_argument("--show", type=int, default=50, help="diff rows to print (default: 50)")
+    parser.add_argument("--csv", help="also write the full diff to this CSV file")
+    args = parser.parse_args()
+
+    if not 1 <= args.month <= 12:
+        parser.error("--month must be 1-12")
+
+    with app.app_context():
+        if app.config.get("LEAVE_ACCRUAL") != "monthly":
+            print("LEAVE_ACCRUAL is not 'monthly'; ledger rows already hold the yearly quota. Nothing to do.")
+            raise SystemExit(1)
+
+        df = run_accrual(args.year, args.month, dry_run=args.dry_run)
+        diff = df[df["changed"] & (df["credit"] != 0)].sort_values(["email", "leave_type"])
+
+        for row in diff.head(args.show).itertuples():
+            before = "new" if row.entitled != row.entitled else f"{row.entitled:g}"  # NaN: no ledger row yet
+            print(f"{row.email:<40} {row.leave_type:<12} {before:>6} -> {row.new_entitled:<6g} ({row.credit:+g})")
+        if len(diff) > args.show:
+            print(f"... {len(diff) - args.show} more")
+        if args.csv:
+            diff[["user_id", "email", "leave_type", "entitled", "new_entitled", "credit"]].to_csv(args.csv, index=False)
+
+        verb = "Would credit" if args.dry_run else "Credited"
+        print(f"{verb} {diff['credit'].sum():g} day(s) across {len(diff)} ledger row(s) "
+              f"for {args.year}-{args.month:02d} ({int(df['changed'].sum())} row(s) accrued through this month). ✅")
@@ -5,6 +5,7 @@ from itsdangerous import URLSafeTimedSerializer
 from extensions import db, login_manager, mail
 from grievances.models import Grievance
 from accounts.models import User
+from accounts.identity import get_user_cache, invalidate_user
 import os
 import socket
 from sqlalchemy import text
@@ -47,6 +48,61 @@ app.config['MAIL_USERNAME'] = os.getenv('MAIL_USER')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASS')
 app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
 
+# --- ATTENDANCE CONFIGURATION ---
+# Clock-ins after this IST wall-clock time count as late arrivals in the rollups
+app.config['SHIFT_LATE_AFTER'] = os.getenv('SHIFT_LATE_AFTER', '09:30')
+# Missed clock-outs are closed nightly: "cap" at SHIFT_END, or "flag" (zero hours, HR review)
+app.config['SHIFT_END'] = os.getenv('SHIFT_END', '18:00')
+app.config['MISSED_SHIFT_POLICY'] = os.getenv('MISSED_SHIFT_POLICY', 'cap')
+# Months kept in the hot attendance table; older closed months go to attendance_archive
+app.config['ATTENDANCE_HOT_MONTHS'] = int(os.getenv('ATTENDANCE_HOT_MONTHS', 2))
+# Office geofences: CSV with name,lat,lon,radius_m. Clock-ins are tagged with the site they fall in;
+# with GEOFENCE_ENFORCE on, clock-ins outside every fence are rejected
+app.config['GEOFENCES'] = os.getenv('GEOFENCES', 'data/geofences.csv')
+app.config['GEOFENCE_GRID_DEG'] = float(os.getenv('GEOFENCE_GRID_DEG', 0.01))
+app.config['GEOFENCE_ENFORCE'] = os.getenv('GEOFENCE_ENFORCE', 'false').lower() == 'true'
+# The live HR board polls attendance once per interval per worker, shared by every open tab
+app.config['LIVE_BOARD_POLL_SECONDS'] = float(os.getenv('LIVE_BOARD_POLL_SECONDS', 2.0))
+# Each poll re-reads changes this far behind the newest one seen, for writes that commit late
+app.config['LIVE_BOARD_OVERLAP_SECONDS'] = float(os.getenv('LIVE_BOARD_OVERLAP_SECONDS', 300))
+
+# --- LEAVE CONFIGURATION ---
+# Yearly quota per leave type, e.g. "Sick:8,Casual:8,Earned:8"; seeds new leave ledger rows
+app.config['LEAVE_QUOTAS'] = {
+    leave_type.strip(): float(days)
+    for leave_type, days in (item.split(':') for item in os.getenv('LEAVE_QUOTAS', 'Sick:8,Casual:8,Earned:8').split(','))
+}
+# Working days as a Mon..Sun mask; weekends and the holidays table are never charged as leave
+app.config['WORK_WEEK'] = os.getenv('WORK_WEEK', '1111100')
+# 'yearly': the full quota is available from January. 'monthly': ledger rows open at zero and
+# accrue_leave.py credits quota/12 per month, pro-rated from the joining date
+app.config['LEAVE_ACCRUAL'] = os.getenv('LEAVE_ACCRUAL', 'yearly').lower()
+
+# --- USER CACHE CONFIGURATION ---
+# Identity/role/active flag behind current_user, cached per process for USER_CACHE_TTL seconds.
+# Set USER_CACHE_URL (redis://...) to share entries and invalidations across workers
+app.config['USER_CACHE_TTL'] = int(os.getenv('USER_CACHE_TTL', 60))
+app.config['USER_CACHE_SIZE'] = int(os.getenv('USER_CACHE_SIZE', 10000))
+app.config['USER_CACHE_URL'] = os.getenv('USER_CACHE_URL')
+
+# --- GEOCODING CONFIGURATION ---
+# Precision is in decimal places of lat/lon: 4 ~ 11 m, 3 ~ 110 m
+app.config['GEOCODE_CACHE_PRECISION'] = int(os.getenv('GEOCODE_CACHE_PRECISION', 4))
+app.config['GEOCODE_CACHE_TTL'] = int(os.getenv('GEOCODE_CACHE_TTL', 30 * 24 * 3600))
+app.config['GEOCODE_CACHE_SIZE'] = int(os.getenv('GEOCODE_CACHE_SIZE', 1024))
+app.config['GEOCODE_CACHE_MAX_ROWS'] = int(os.getenv('GEOCODE_CACHE_MAX_ROWS', 50000))
+
+# Backend: "nominatim" (OpenStreetMap), "gazetteer" (local CSV of sites, Nominatim
+# beyond GEOCODE_GAZETTEER_MAX_KM) or "stub" (offline stand-in for tests)
+app.config['GEOCODER_BACKEND'] = os.getenv('GEOCODER_BACKEND', 'nominatim')
+app.config['GEOCODE_GAZETTEER'] = os.getenv('GEOCODE_GAZETTEER', 'data/gazetteer.csv')
+app.config['GEOCODE_GAZETTEER_MAX_KM'] = float(os.getenv('GEOCODE_GAZETTEER_MAX_KM', 0.5))
+# Resolve addresses on a background thread pool so clock-in never waits on the network
+app.config['GEOCODE_ASYNC'] = os.getenv('GEOCODE_ASYNC', 'true').lower() == 'true'
+app.config['GEOCODE_WORKERS'] = int(os.getenv('GEOCODE_WORKERS', 2))
+app.config['GEOCODE_MAX_RETRIES'] = int(os.getenv('GEOCODE_MAX_RETRIES', 3))
+app.config['GEOCODE_RETRY_BACKOFF'] = float(os.getenv('GEOCODE_RETRY_BACKOFF', 2.0))
+
 # Initialize Extensions
 db.init_app(app)
 login_manager.init_app(app)
@@ -67,7 +123,8 @@ app.register_blueprint(planner_bp)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Served from the identity cache; a deactivated account loads as None and is logged out
+    return get_user_cache().load(int(user_id))
 
 # ================= AUTHENTICATION ROUTES =================
 
@@ -160,6 +217,7 @@ def reset_password(token):
         if user:
             user.set_password(request.form.get('password'))
             db.session.commit()
+            invalidate_user(user.id)
             flash('Password updated!', 'success')
             return redirect(url_for('login'))
     return render_template('accounts/reset_with_new_password.html')
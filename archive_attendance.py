@@ -0,0 +1,20 @@
+import argparse
+from app import app
+from attendance.archive import archivable_months, archive_month
+
+# Monthly cron entry point: moves closed months out of the hot attendance table.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive closed attendance months.")
+    parser.add_argument("--keep-months", type=int, help="months kept hot (default: ATTENDANCE_HOT_MONTHS)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        keep = args.keep_months or app.config['ATTENDANCE_HOT_MONTHS']
+        for month in archivable_months(keep):
+            try:
+                moved = archive_month(month)
+                print(f"{month:%B %Y}: archived {moved} row(s)")
+            except ValueError as e:
+                print(f"{month:%B %Y}: skipped. {e}")
+                break
+        print("Archival complete. ✅")
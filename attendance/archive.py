@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+import pytz
+from sqlalchemy import delete, func, insert, select, text
+
+from extensions import db
+from attendance.models import Attendance, AttendanceArchive
+from attendance.rollups import month_start, next_month
+
+IST = pytz.timezone('Asia/Kolkata')
+
+ARCHIVE_COLUMNS = ["id", "date", "user_id", "clock_in", "clock_out", "total_hours",
+                   "location", "location_out", "lat_in", "lon_in", "lat_out", "lon_out", "site",
+                   "auto_closed", "needs_review"]
+
+
+def hot_floor():
+    """Earliest date still held in the hot attendance table (None when it is empty)."""
+    return db.session.execute(select(func.min(Attendance.date))).scalar()
+
+
+def archivable_months(keep_months):
+    """Month starts in the hot table older than the newest `keep_months` months."""
+    floor = hot_floor()
+    if floor is None:
+        return []
+
+    # IST, like the rest of attendance; the server's local date can be a day off around midnight
+    cutoff = month_start(datetime.now(IST).date())
+    for _ in range(keep_months - 1):
+        cutoff = month_start(date.fromordinal(cutoff.toordinal() - 1))
+
+    months, month = [], month_start(floor)
+    while month < cutoff:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def ensure_partition(month):
+    """Postgres only: creates the archive partition covering `month`."""
+    if db.engine.dialect.name != "postgresql":
+        return
+    end = next_month(month)
+    db.session.execute(text(
+        f"CREATE TABLE IF NOT EXISTS attendance_archive_{month:%Y_%m} "
+        f"PARTITION OF attendance_archive FOR VALUES FROM ('{month}') TO ('{end}')"
+    ))
+
+
+def archive_month(month):
+    """
+    Moves one closed month from attendance to attendance_archive in a single
+    transaction. Refuses while the month still has open shifts, so run
+    close_missed_shifts.py first. Returns the number of rows moved.
+    """
+    start, end = month_start(month), next_month(month)
+    in_month = (Attendance.date >= start, Attendance.date < end)
+
+    open_shifts = db.session.execute(
+        select(func.count()).select_from(Attendance).where(*in_month, Attendance.clock_out.is_(None))
+    ).scalar()
+    if open_shifts:
+        raise ValueError(f"{start:%B %Y} still has {open_shifts} open shift(s); close them before archiving.")
+
+    ensure_partition(start)
+    columns = [getattr(Attendance, c) for c in ARCHIVE_COLUMNS]
+    db.session.execute(
+        insert(AttendanceArchive).from_select(ARCHIVE_COLUMNS, select(*columns).where(*in_month))
+    )
+    moved = db.session.execute(delete(Attendance).where(*in_month)).rowcount
+    db.session.commit()
+    return moved
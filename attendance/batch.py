@@ -0,0 +1,88 @@
+from collections import defaultdict
+from datetime import datetime
+
+import pytz
+from flask import current_app
+from sqlalchemy import case, literal, select, update
+
+from extensions import db
+from attendance.models import Attendance, AttendanceDaily, AttendanceUserMonthly, ShiftCloseRun
+from attendance.queries import seconds_between
+
+IST = pytz.timezone('Asia/Kolkata')
+
+CLOSE_POLICIES = ("cap", "flag")
+
+
+def shift_end_for(day):
+    """SHIFT_END ('HH:MM', IST) on `day`, in the form the clock columns store."""
+    end = datetime.strptime(current_app.config.get('SHIFT_END', '18:00'), '%H:%M').time()
+    end_dt = IST.localize(datetime.combine(day, end))
+    if db.engine.dialect.name == "sqlite":
+        # SQLite keeps the IST wall-clock time without an offset
+        return end_dt.replace(tzinfo=None)
+    return end_dt
+
+
+def stale_shift_dates(before):
+    """Distinct dates before `before` that still have open shifts."""
+    return db.session.execute(
+        select(Attendance.date).where(Attendance.clock_out.is_(None), Attendance.date < before)
+        .distinct().order_by(Attendance.date)
+    ).scalars().all()
+
+
+def close_missed_shifts(day, policy="cap"):
+    """
+    Closes every open shift on `day` with one set-based UPDATE.
+
+    cap  -- clock out at SHIFT_END (or at clock-in, if that was later) and credit the hours
+    flag -- clock out at clock-in with zero hours and mark the row for HR review
+
+    Rollups are adjusted in the same transaction and the run is logged in
+    shift_close_runs. Returns the number of shifts closed.
+    """
+    if policy not in CLOSE_POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}; expected one of {CLOSE_POLICIES}")
+
+    open_ids = db.session.execute(
+        select(Attendance.id).where(Attendance.date == day, Attendance.clock_out.is_(None))
+    ).scalars().all()
+
+    closed = 0
+    if open_ids:
+        if policy == "cap":
+            end = literal(shift_end_for(day), Attendance.clock_out.type)
+            clock_out = case((Attendance.clock_in > end, Attendance.clock_in), else_=end)
+            seconds = seconds_between(Attendance.clock_in, clock_out)
+            hours = case((seconds > 0, seconds / 3600.0), else_=0.0)
+            values = {"clock_out": clock_out, "total_hours": hours, "auto_closed": True}
+        else:
+            values = {"clock_out": Attendance.clock_in, "total_hours": 0.0,
+                      "auto_closed": True, "needs_review": True}
+
+        # The clock_out IS NULL guard skips anyone who clocked out since the SELECT
+        result = db.session.execute(
+            update(Attendance)
+            .where(Attendance.id.in_(open_ids), Attendance.clock_out.is_(None))
+            .values(values)
+            .execution_options(synchronize_session=False)
+        )
+        closed = result.rowcount
+
+        rows = db.session.execute(
+            select(Attendance.user_id, Attendance.total_hours)
+            .where(Attendance.id.in_(open_ids), Attendance.auto_closed.is_(True))
+        ).all()
+        per_user = defaultdict(lambda: [0, 0.0])
+        for row in rows:
+            per_user[row.user_id][0] += 1
+            per_user[row.user_id][1] += row.total_hours or 0.0
+
+        AttendanceDaily.bump(day, open_shifts=-len(rows), total_hours=sum(h for _, h in per_user.values()))
+        for user_id, (count, hours) in per_user.items():
+            AttendanceUserMonthly.bump(user_id, day, open_shifts=-count, total_hours=hours)
+
+    db.session.add(ShiftCloseRun(target_date=day, policy=policy, rows_closed=closed))
+    db.session.commit()
+    return closed
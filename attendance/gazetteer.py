@@ -0,0 +1,92 @@
+import csv
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vector(lat, lon):
+    """Maps lat/lon (degrees) onto the unit sphere so Euclidean chord length orders points like haversine distance."""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class KDTree:
+    """
+    Static 3-D KD-tree over unit-sphere points. Built once in O(n log n),
+    answers nearest-neighbour queries in O(log n) on average.
+    """
+
+    def __init__(self, points):
+        # points: list of (xyz_tuple, payload)
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda p: p[0][axis])
+        mid = len(points) // 2
+        return (
+            points[mid],
+            axis,
+            self._build(points[:mid], depth + 1),
+            self._build(points[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, xyz):
+        """Returns (payload, chord_distance) of the closest point, or (None, inf) when empty."""
+        best = [None, float("inf")]
+        # Each entry carries the distance to the splitting plane that led to it
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, plane_dist = stack.pop()
+            if node is None or plane_dist >= best[1]:
+                continue
+            (point, payload), axis, left, right = node
+            dist = math.dist(point, xyz)
+            if dist < best[1]:
+                best[0], best[1] = payload, dist
+
+            diff = xyz[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # The far side is re-checked against the best match when popped
+            stack.append((far, abs(diff)))
+            stack.append((near, 0.0))
+        return best[0], best[1]
+
+
+class Gazetteer:
+    """
+    Named places (offices, client sites) loaded from a CSV with `name`,
+    `lat` and `lon` columns; an optional `address` column is used as the
+    display text when present.
+    """
+
+    def __init__(self, places):
+        self.size = len(places)
+        self.tree = KDTree(
+            (to_unit_vector(lat, lon), label) for label, lat, lon in places
+        )
+
+    @classmethod
+    def from_csv(cls, path):
+        places = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                try:
+                    lat, lon = float(row["lat"]), float(row["lon"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                label = (row.get("address") or row.get("name") or "").strip()
+                if label:
+                    places.append((label, lat, lon))
+        return cls(places)
+
+    def nearest(self, lat, lon):
+        """Returns (label, distance_km) of the closest place."""
+        label, chord = self.tree.nearest(to_unit_vector(lat, lon))
+        return label, chord_to_km(chord)
@@ -0,0 +1,254 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import requests
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from attendance.models import GeocodeCacheEntry
+from attendance.gazetteer import Gazetteer
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
+
+
+def parse_coords(coords_str):
+    """
+    Parses 'Lat: 28.123, Lon: 77.123' into a (lat, lon) float tuple.
+    Returns None when the string is missing or malformed.
+    """
+    if not coords_str or "Lat:" not in coords_str:
+        return None
+    try:
+        parts = coords_str.replace("Lat:", "").replace("Lon:", "").split(",")
+        return float(parts[0].strip()), float(parts[1].strip())
+    except (IndexError, ValueError):
+        return None
+
+
+class GeocodeCache:
+    """
+    Two-tier reverse-geocoding cache keyed on a quantized lat/lon grid.
+
+    Tier 1 is an in-process LRU (OrderedDict), tier 2 is the `geocode_cache`
+    table so resolved addresses survive worker restarts. Both tiers honour
+    the same TTL; the LRU is bounded by `max_entries` and the table is
+    trimmed to `max_rows` (oldest first) every `trim_every` writes.
+    """
+
+    def __init__(self, precision=4, ttl=30 * 24 * 3600, max_entries=1024,
+                 max_rows=50000, trim_every=100):
+        self.precision = precision
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.trim_every = trim_every
+
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def cell(self, lat, lon):
+        """Snaps a coordinate to the configured precision grid."""
+        return f"{round(lat, self.precision):.{self.precision}f},{round(lon, self.precision):.{self.precision}f}"
+
+    def get(self, lat, lon):
+        key = self.cell(lat, lon)
+        now = time.time()
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                address, stored_at = entry
+                if now - stored_at < self.ttl:
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                    return address
+                del self._lru[key]
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(GeocodeCacheEntry.address, GeocodeCacheEntry.created_at)
+                .where(GeocodeCacheEntry.cell == key, GeocodeCacheEntry.created_at >= cutoff)
+            ).first()
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.db_hits += 1
+            age = (datetime.utcnow() - row.created_at).total_seconds()
+            self._remember(key, row.address, now - age)
+        return row.address
+
+    def set(self, lat, lon, address):
+        key = self.cell(lat, lon)
+        address = address[:255]
+
+        with self._lock:
+            self._remember(key, address, time.time())
+            self._writes += 1
+            trim = self._writes % self.trim_every == 0
+
+        values = {"address": address, "created_at": datetime.utcnow()}
+        try:
+            with db.engine.begin() as conn:
+                result = conn.execute(
+                    update(GeocodeCacheEntry).where(GeocodeCacheEntry.cell == key).values(**values)
+                )
+                if result.rowcount == 0:
+                    conn.execute(GeocodeCacheEntry.__table__.insert().values(cell=key, **values))
+        except IntegrityError:
+            # Another worker inserted the same cell first; its address is just as good.
+            pass
+
+        if trim:
+            self.trim()
+
+    def trim(self):
+        """Drops expired rows, then the oldest rows beyond `max_rows`."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        with db.engine.begin() as conn:
+            conn.execute(delete(GeocodeCacheEntry).where(GeocodeCacheEntry.created_at < cutoff))
+            total = conn.execute(select(func.count()).select_from(GeocodeCacheEntry)).scalar()
+            surplus = total - self.max_rows
+            if surplus > 0:
+                oldest = select(GeocodeCacheEntry.cell).order_by(GeocodeCacheEntry.created_at).limit(surplus)
+                conn.execute(delete(GeocodeCacheEntry).where(GeocodeCacheEntry.cell.in_(oldest)))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._lru),
+                "precision": self.precision,
+            }
+
+    def _remember(self, key, address, stored_at):
+        # Caller holds self._lock
+        self._lru[key] = (address, stored_at)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """Returns the per-process cache, built from app config on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = current_app.config
+                _cache = GeocodeCache(
+                    precision=config.get("GEOCODE_CACHE_PRECISION", 4),
+                    ttl=config.get("GEOCODE_CACHE_TTL", 30 * 24 * 3600),
+                    max_entries=config.get("GEOCODE_CACHE_SIZE", 1024),
+                    max_rows=config.get("GEOCODE_CACHE_MAX_ROWS", 50000),
+                )
+    return _cache
+
+
+def fetch_address(lat, lon):
+    """Reverse geocoding via Nominatim (OpenStreetMap). Returns None when there is no match."""
+    headers = {'User-Agent': 'HR_Portal_App_v1'}
+    params = {"format": "json", "lat": lat, "lon": lon}
+    response = requests.get(NOMINATIM_URL, params=params, headers=headers, timeout=5)
+    response.raise_for_status()
+    return response.json().get('display_name')
+
+
+def stub_address(lat, lon):
+    """Local stand-in geocoder for tests and offline development; never touches the network."""
+    return f"Near {lat:.4f}, {lon:.4f}"
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Loads GEOCODE_GAZETTEER into a KD-tree once per process."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                path = os.path.join(current_app.root_path, current_app.config["GEOCODE_GAZETTEER"])
+                _gazetteer = Gazetteer.from_csv(path)
+    return _gazetteer
+
+
+def gazetteer_address(lat, lon):
+    """
+    Offline lookup against the local gazetteer of offices and client sites.
+    Falls back to Nominatim when the nearest place is further away than
+    GEOCODE_GAZETTEER_MAX_KM.
+    """
+    label, distance_km = get_gazetteer().nearest(lat, lon)
+    if label and distance_km <= current_app.config.get("GEOCODE_GAZETTEER_MAX_KM", 0.5):
+        return label
+    return fetch_address(lat, lon)
+
+
+GEOCODER_BACKENDS = {
+    "nominatim": fetch_address,
+    "gazetteer": gazetteer_address,
+    "stub": stub_address,
+}
+
+
+def get_geocoder():
+    """Returns the backend selected by GEOCODER_BACKEND (defaults to Nominatim)."""
+    return GEOCODER_BACKENDS[current_app.config.get("GEOCODER_BACKEND", "nominatim")]
+
+
+def resolve_address(lat, lon):
+    """
+    Cache-aware lookup. Returns None when the backend has no match and lets
+    network errors propagate so background jobs can retry them.
+    """
+    cache = get_geocode_cache()
+    address = cache.get(lat, lon)
+    if address:
+        return address
+
+    address = get_geocoder()(lat, lon)
+    if address:
+        cache.set(lat, lon, address)
+    return address
+
+
+def get_readable_address(coords_str):
+    """
+    Converts 'Lat: 28.123, Lon: 77.123' into a real street address.
+    Punches from the same building share a cache cell, so only the first
+    one pays for the Nominatim round trip.
+    """
+    if not coords_str or "Lat:" not in coords_str:
+        return "Location N/A"
+
+    coords = parse_coords(coords_str)
+    if coords is None:
+        return coords_str
+
+    try:
+        return resolve_address(*coords) or coords_str
+    except Exception as e:
+        print(f"Geocoding error: {e}")
+        return coords_str
@@ -0,0 +1,123 @@
+import csv
+import math
+import os
+import threading
+from collections import defaultdict, namedtuple
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from extensions import db
+from attendance.models import Attendance
+from attendance.gazetteer import EARTH_RADIUS_KM
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+Geofence = namedtuple("Geofence", "name lat lon radius_km")
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlam = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeofenceGrid:
+    """
+    Uniform lat/lon grid over circular office geofences. Each fence is
+    registered in every cell its bounding box touches, so a lookup hashes the
+    point to a single cell and runs the exact distance test only on the few
+    fences registered there.
+    """
+
+    def __init__(self, fences, cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self.fences = list(fences)
+        self._cells = defaultdict(list)
+        for fence in self.fences:
+            dlat = fence.radius_km / KM_PER_DEGREE
+            dlon = dlat / max(math.cos(math.radians(fence.lat)), 1e-6)
+            for i in range(self._index(fence.lat - dlat), self._index(fence.lat + dlat) + 1):
+                for j in range(self._index(fence.lon - dlon), self._index(fence.lon + dlon) + 1):
+                    self._cells[(i, j)].append(fence)
+
+    def _index(self, degrees):
+        return math.floor(degrees / self.cell_deg)
+
+    @property
+    def names(self):
+        return sorted({fence.name for fence in self.fences})
+
+    def locate(self, lat, lon):
+        """Name of the nearest fence containing the point, or None when it is outside all of them."""
+        best, best_km = None, None
+        for fence in self._cells.get((self._index(lat), self._index(lon)), ()):
+            km = haversine_km(lat, lon, fence.lat, fence.lon)
+            if km <= fence.radius_km and (best_km is None or km < best_km):
+                best, best_km = fence.name, km
+        return best
+
+    @classmethod
+    def from_csv(cls, path, cell_deg=0.01):
+        """CSV with name, lat, lon, radius_m columns."""
+        fences = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                fences.append(Geofence(
+                    row["name"].strip(), float(row["lat"]), float(row["lon"]), float(row["radius_m"]) / 1000,
+                ))
+        return cls(fences, cell_deg)
+
+
+_grid = None
+_grid_lock = threading.Lock()
+
+
+def get_geofences():
+    """Loads GEOFENCES into the grid once per process; no file means no fences."""
+    global _grid
+    if _grid is None:
+        with _grid_lock:
+            if _grid is None:
+                path = os.path.join(current_app.root_path, current_app.config["GEOFENCES"])
+                cell_deg = current_app.config.get("GEOFENCE_GRID_DEG", 0.01)
+                _grid = GeofenceGrid.from_csv(path, cell_deg) if os.path.exists(path) else GeofenceGrid([], cell_deg)
+    return _grid
+
+
+def locate_site(coords):
+    """Site name for a (lat, lon) tuple, or None for missing coordinates or a point outside every fence."""
+    if coords is None:
+        return None
+    return get_geofences().locate(*coords)
+
+
+def geofence_enforced():
+    """Clock-ins are only rejected when enforcement is on and at least one fence is configured."""
+    return current_app.config.get("GEOFENCE_ENFORCE", False) and bool(get_geofences().fences)
+
+
+def retag_sites(since):
+    """
+    Re-runs the fence lookup for clock-ins on or after `since`, e.g. after
+    GEOFENCES changed. One UPDATE per site. Returns the number of rows retagged.
+    """
+    rows = db.session.execute(
+        select(Attendance.id, Attendance.lat_in, Attendance.lon_in, Attendance.site)
+        .where(Attendance.date >= since, Attendance.lat_in.isnot(None))
+    ).all()
+
+    moves = defaultdict(list)
+    for row in rows:
+        site = locate_site((row.lat_in, row.lon_in))
+        if site != row.site:
+            moves[site].append(row.id)
+
+    for site, ids in moves.items():
+        for i in range(0, len(ids), 500):
+            db.session.execute(
+                update(Attendance).where(Attendance.id.in_(ids[i:i + 500])).values(site=site)
+            )
+    db.session.commit()
+    return sum(len(ids) for ids in moves.values())
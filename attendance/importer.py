@@ -0,0 +1,216 @@
+import csv
+import io
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, text
+
+from extensions import db
+from db_utils import insert_ignore
+from accounts.models import User
+from attendance.models import Attendance, AttendanceArchive, AttendanceDaily, AttendanceUserMonthly, is_late, late_cutoff
+
+# Fixed offset instead of pytz: IST has no DST and localize() dominates a 1M-row import
+IST = timezone(timedelta(hours=5, minutes=30))
+
+CHUNK_SIZE = 5000
+DEFAULT_SOURCE = "Badge Reader"
+
+
+def _user_lookup(header):
+    """Maps the employee column of the export to users.id with a single query."""
+    if "user_id" in header:
+        valid = set(db.session.execute(select(User.id)).scalars())
+        return "user_id", lambda value: int(value) if value.isdigit() and int(value) in valid else None
+    emails = dict(db.session.execute(select(User.email, User.id)).all())
+    return "email", lambda value: emails.get(value.strip())
+
+
+def pair_punches(lines):
+    """
+    Streams punch rows (header: email or user_id, timestamp, optional device)
+    and folds them into one shift per employee per day: the earliest punch is
+    the clock-in and the latest, if different, the clock-out. Timestamps with
+    an offset are converted to IST, plain ones are taken as IST, so days are
+    IST days. Memory grows with employee-days, not with punches.
+    Returns (shifts, stats) where shifts maps
+    (user_id, date) -> [first, last, device_in, device_out].
+    """
+    reader = csv.reader(lines)
+    header = [h.strip().lower() for h in next(reader)]
+    key_col, resolve = _user_lookup(header)
+    key_idx, ts_idx = header.index(key_col), header.index("timestamp")
+    device_idx = header.index("device") if "device" in header else None
+
+    def device_of(row):
+        if device_idx is None or len(row) <= device_idx:
+            return DEFAULT_SOURCE
+        return row[device_idx].strip() or DEFAULT_SOURCE
+
+    shifts = {}
+    stats = {"punches": 0, "unknown_employee": 0, "bad_rows": 0}
+    for row in reader:
+        stats["punches"] += 1
+        try:
+            user_id = resolve(row[key_idx])
+            stamp = datetime.fromisoformat(row[ts_idx].strip())
+        except (IndexError, ValueError):
+            stats["bad_rows"] += 1
+            continue
+        stamp = stamp.astimezone(IST) if stamp.tzinfo else stamp.replace(tzinfo=IST)
+        if user_id is None:
+            stats["unknown_employee"] += 1
+            continue
+
+        key = (user_id, stamp.date())
+        shift = shifts.get(key)
+        if shift is None:
+            device = device_of(row)
+            shifts[key] = [stamp, stamp, device, device]
+        elif stamp < shift[0]:
+            shift[0], shift[2] = stamp, device_of(row)
+        elif stamp > shift[1]:
+            shift[1], shift[3] = stamp, device_of(row)
+    return shifts, stats
+
+
+def _shift_rows(shifts):
+    for (user_id, day), (first, last, device_in, device_out) in shifts.items():
+        closed = last > first
+        yield {
+            "user_id": user_id,
+            "date": day,
+            "clock_in": first,
+            "clock_out": last if closed else None,
+            "total_hours": round((last - first).total_seconds() / 3600, 2) if closed else 0.0,
+            "location": device_in[:255],
+            "location_out": device_out[:255] if closed else None,
+            "auto_closed": False,
+            "needs_review": False,
+        }
+
+
+def _insert_chunks(rows):
+    """
+    Returns the (user_id, date) keys actually inserted; rows skipped by the
+    conflict clause (e.g. a live clock-in racing the import) are left out.
+    Without RETURNING support (MySQL) every row is assumed inserted.
+    """
+    # Core statement on the table: the ORM bulk path would split rows by which values are NULL
+    stmt = insert_ignore(Attendance.__table__, ["user_id", "date"])
+    returning = db.engine.dialect.insert_executemany_returning
+    if returning:
+        stmt = stmt.returning(Attendance.__table__.c.user_id, Attendance.__table__.c.date)
+    conn = db.session.connection()
+    inserted, chunk = set(), []
+
+    def flush():
+        result = conn.execute(stmt, chunk)
+        inserted.update(map(tuple, result) if returning else ((r["user_id"], r["date"]) for r in chunk))
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+    return inserted
+
+
+def _copy_rows(rows):
+    """
+    Postgres fast path: COPY into a temp table, then one INSERT ... SELECT ...
+    ON CONFLICT DO NOTHING. Returns the (user_id, date) keys actually inserted.
+    """
+    columns = ["user_id", "date", "clock_in", "clock_out", "total_hours",
+               "location", "location_out", "auto_closed", "needs_review"]
+    db.session.execute(text("""
+        CREATE TEMP TABLE attendance_import (
+            user_id INTEGER, date DATE, clock_in TIMESTAMPTZ, clock_out TIMESTAMPTZ,
+            total_hours DOUBLE PRECISION, location VARCHAR(255), location_out VARCHAR(255),
+            auto_closed BOOLEAN, needs_review BOOLEAN
+        ) ON COMMIT DROP
+    """))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(f"COPY attendance_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    result = db.session.execute(text(f"""
+        INSERT INTO attendance ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM attendance_import
+        ON CONFLICT (user_id, date) DO NOTHING
+        RETURNING user_id, date
+    """))
+    return set(map(tuple, result))
+
+
+def _bump_rollups(shifts):
+    """Folds the new shifts into rollup deltas in memory and applies them in bulk."""
+    cutoff = late_cutoff()
+    daily, monthly = {}, {}
+    for (user_id, day), (first, last, _, _) in shifts.items():
+        closed = last > first
+        hours = round((last - first).total_seconds() / 3600, 2) if closed else 0.0
+        late = int(is_late(first, cutoff))
+
+        d = daily.setdefault(day, {"date": day, "headcount": 0, "total_hours": 0.0, "late_arrivals": 0, "open_shifts": 0})
+        d["headcount"] += 1
+        d["total_hours"] += hours
+        d["late_arrivals"] += late
+        d["open_shifts"] += int(not closed)
+
+        month = day.replace(day=1)
+        m = monthly.setdefault((user_id, month), {
+            "user_id": user_id, "month": month, "days_present": 0,
+            "total_hours": 0.0, "late_arrivals": 0, "open_shifts": 0,
+        })
+        m["days_present"] += 1
+        m["total_hours"] += hours
+        m["late_arrivals"] += late
+        m["open_shifts"] += int(not closed)
+
+    AttendanceDaily.bump_many(["date"], list(daily.values()))
+    AttendanceUserMonthly.bump_many(["user_id", "month"], list(monthly.values()))
+
+
+def import_punches(lines):
+    """
+    Imports a badge/door-access punch export. Shifts that already exist for
+    an employee-day, in the hot table or in attendance_archive, are left
+    alone; rollups move in the same transaction as the inserted shifts.
+    Returns a stats dict.
+    """
+    shifts, stats = pair_punches(lines)
+    stats.update(shifts=len(shifts), inserted=0, duplicates=0)
+    if not shifts:
+        return stats
+
+    days = [day for _, day in shifts]
+    start, end = min(days), max(days)
+    for model in (Attendance, AttendanceArchive):
+        existing = db.session.execute(
+            select(model.user_id, model.date)
+            .where(model.date >= start, model.date <= end)
+        ).all()
+        for key in existing:
+            if shifts.pop(tuple(key), None) is not None:
+                stats["duplicates"] += 1
+
+    if not shifts:
+        return stats
+
+    if db.engine.dialect.name == "postgresql":
+        inserted = _copy_rows(_shift_rows(shifts))
+    else:
+        inserted = _insert_chunks(_shift_rows(shifts))
+    # Shifts a concurrent clock-in got to first were skipped by ON CONFLICT
+    stats["duplicates"] += len(shifts) - len(inserted)
+    _bump_rollups({key: shift for key, shift in shifts.items() if key in inserted})
+    db.session.commit()
+    stats["inserted"] = len(inserted)
+    return stats
@@ -0,0 +1,188 @@
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from flask import current_app
+from sqlalchemy import func, select
+
+from extensions import db
+from accounts.models import User
+from attendance.models import Attendance
+
+IST = pytz.timezone('Asia/Kolkata')
+
+
+class LiveBoard:
+    """
+    Per-process change feed for the HR attendance board.
+
+    One poller thread re-reads the attendance rows whose updated_at falls
+    within `overlap` seconds of the newest change it has seen, and compares
+    each with the (id, clock_out) it last published: an unseen id is a
+    clock-in, a new clock_out a clock-out. The overlap catches writes that
+    commit after rows stamped later (updated_at is the statement's time, not
+    the commit's), and updated_at also moves for backdated clock-outs from
+    the end-of-day job and the punch importer. Changes are fanned out to the
+    SSE subscribers' queues, so the database sees one small indexed query
+    per interval however many HR tabs are open. The thread starts with the
+    first subscriber and exits after the last one leaves.
+    """
+
+    def __init__(self, app, interval=2.0, overlap=300.0, queue_size=256):
+        self.app = app
+        self.interval = interval
+        self.overlap = timedelta(seconds=overlap)
+        self.queue_size = queue_size
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._seq = 0
+
+        self.polls = 0
+        self.events = 0
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(q)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="live-board", daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def is_subscribed(self, q):
+        with self._lock:
+            return q in self._subscribers
+
+    def stats(self):
+        with self._lock:
+            return {"subscribers": len(self._subscribers), "polls": self.polls, "events": self.events}
+
+    def _run(self):
+        with self.app.app_context():
+            # Shifts already on the board when the thread starts are history, not events
+            mark, seen = self._watermark()
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                try:
+                    events, mark = self._poll(mark, seen)
+                except Exception as e:
+                    print(f"Live board poll failed: {e}")
+                    events = []
+                for event in events:
+                    self._publish(event)
+                time.sleep(self.interval)
+
+    def _watermark(self):
+        """Newest updated_at, and {id: (date, clock_out)} for every shift in the window."""
+        with db.engine.connect() as conn:
+            mark = conn.execute(select(func.max(Attendance.updated_at))).scalar()
+            rows = conn.execute(
+                select(Attendance.id, Attendance.date, Attendance.clock_out).where(Attendance.date >= self._since())
+            ).all()
+        return mark, {row.id: (row.date, row.clock_out) for row in rows}
+
+    def _since(self):
+        # Yesterday's shifts can still be clocked out shortly after midnight
+        return datetime.now(IST).date() - timedelta(days=1)
+
+    def _poll(self, mark, seen):
+        """Returns (events, new mark); `seen` is updated in place."""
+        since = self._since()
+        conds = [Attendance.date >= since]
+        if mark is not None:
+            conds.append(Attendance.updated_at >= mark - self.overlap)
+
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                select(
+                    Attendance.id, Attendance.date, Attendance.clock_in, Attendance.clock_out,
+                    Attendance.site, Attendance.updated_at, User.email,
+                )
+                .join(User, User.id == Attendance.user_id)
+                .where(*conds)
+                .order_by(Attendance.updated_at, Attendance.id)
+            ).all()
+        self.polls += 1
+
+        events = []
+        for row in rows:
+            previous = seen.get(row.id)
+            if previous is None:
+                events.append(("clock_in", row))
+            # A shift opened and closed between two polls yields both events
+            if row.clock_out is not None and (previous is None or previous[1] != row.clock_out):
+                events.append(("clock_out", row))
+            seen[row.id] = (row.date, row.clock_out)
+            if row.updated_at is not None and (mark is None or row.updated_at > mark):
+                mark = row.updated_at
+
+        for row_id in [row_id for row_id, (day, _) in seen.items() if day < since]:
+            del seen[row_id]
+        return events, mark
+
+    def _publish(self, event):
+        kind, row = event
+        payload = json.dumps({
+            "id": row.id,
+            "email": row.email,
+            "date": row.date.isoformat(),
+            "clock_in": row.clock_in.strftime("%I:%M:%S %p"),
+            "clock_out": row.clock_out.strftime("%I:%M:%S %p") if row.clock_out else None,
+            "site": row.site,
+        })
+        with self._lock:
+            self._seq += 1
+            self.events += 1
+            message = f"id: {self._seq}\nevent: {kind}\ndata: {payload}\n\n"
+            for q in list(self._subscribers):
+                try:
+                    q.put_nowait(message)
+                except queue.Full:
+                    # A stalled tab is cut loose rather than holding up everyone else
+                    self._subscribers.discard(q)
+
+
+_board = None
+_board_lock = threading.Lock()
+
+
+def get_live_board():
+    """Returns this worker's board, built from app config on first use."""
+    global _board
+    if _board is None:
+        with _board_lock:
+            if _board is None:
+                app = current_app._get_current_object()
+                _board = LiveBoard(
+                    app,
+                    interval=app.config.get("LIVE_BOARD_POLL_SECONDS", 2.0),
+                    overlap=app.config.get("LIVE_BOARD_OVERLAP_SECONDS", 300.0),
+                )
+    return _board
+
+
+def event_stream(board, q, keepalive=15):
+    """SSE generator for one subscriber; sends a comment line while idle so proxies keep the socket open."""
+    try:
+        yield "retry: 5000\n\n"
+        while board.is_subscribed(q):
+            try:
+                yield q.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+        # Dropped for falling behind: the browser reloads the board to resync
+        yield "event: reset\ndata: {}\n\n"
+    finally:
+        board.unsubscribe(q)
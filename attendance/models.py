@@ -1,4 +1,6 @@
 from extensions import db
+from db_utils import RollupMixin, insert_ignore
+from flask import current_app
 from datetime import datetime
 import pytz
 
@@ -25,4 +27,190 @@ class Attendance(db.Model):
     # NEW: Added this column to store the Clock-Out spot
     location_out = db.Column(db.String(255))
 
-    user = db.relationship("User", backref=db.backref("attendance_logs", lazy=True))
\ No newline at end of file
+    # Numeric copies of the punch coordinates; location/location_out end up holding the address
+    lat_in = db.Column(db.Float)
+    lon_in = db.Column(db.Float)
+    lat_out = db.Column(db.Float)
+    lon_out = db.Column(db.Float)
+
+    # Office geofence the clock-in fell inside (see attendance/geofence.py); NULL when off-site
+    site = db.Column(db.String(100))
+
+    # Set by the end-of-day job (close_missed_shifts.py) when it closes a forgotten shift
+    auto_closed = db.Column(db.Boolean, default=False)
+    needs_review = db.Column(db.Boolean, default=False)
+
+    # Database clock, set on every insert and update; the live board polls on it (see attendance/live.py)
+    updated_at = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+    user = db.relationship("User", backref=db.backref("attendance_logs", lazy=True))
+
+    __table_args__ = (
+        # One shift per employee per day; also backs every (user_id, date) lookup
+        db.UniqueConstraint('user_id', 'date', name='_user_date_uc'),
+        # Small partial index over open shifts only, for "is this user clocked in?"
+        db.Index(
+            'ix_attendance_open_shift', 'user_id',
+            postgresql_where=db.text('clock_out IS NULL'),
+            sqlite_where=db.text('clock_out IS NULL'),
+        ),
+        # Keyset pagination order for the HR listings
+        db.Index('ix_attendance_date_id', 'date', 'id'),
+        # "Who clocked in at office X on day Y"
+        db.Index('ix_attendance_site_date', 'site', 'date'),
+        # Change feed for the live board
+        db.Index('ix_attendance_updated_at', 'updated_at'),
+    )
+
+    @classmethod
+    def start_shift(cls, user_id, day, when, location=None, coords=None, site=None):
+        """
+        Opens the day's shift with a single INSERT ... ON CONFLICT DO NOTHING,
+        so double-submits cannot race into duplicate rows.
+        Returns the new row id, or None if the user already clocked in that day.
+        """
+        lat, lon = coords or (None, None)
+        stmt = insert_ignore(cls, ['user_id', 'date']).values(
+            user_id=user_id, date=day, clock_in=when, location=location,
+            lat_in=lat, lon_in=lon, site=site,
+        )
+        result = db.session.execute(stmt)
+        if result.rowcount != 1:
+            db.session.rollback()
+            return None
+
+        # Rollups move in the same transaction as the punch itself
+        late = int(is_late(when))
+        AttendanceDaily.bump(day, headcount=1, late_arrivals=late, open_shifts=1)
+        AttendanceUserMonthly.bump(user_id, day, days_present=1, late_arrivals=late, open_shifts=1)
+        db.session.commit()
+        return result.inserted_primary_key[0]
+
+    @classmethod
+    def end_shift(cls, user_id, day, when, location=None, coords=None):
+        """
+        Closes the day's open shift and fills total_hours.
+        Returns the row id, or None if there was no open shift.
+        """
+        shift = db.session.query(cls.id, cls.clock_in).filter_by(
+            user_id=user_id, date=day, clock_out=None
+        ).first()
+        if shift is None:
+            return None
+
+        started = shift.clock_in.replace(tzinfo=None)
+        hours = max((when.replace(tzinfo=None) - started).total_seconds(), 0) / 3600
+
+        # The clock_out IS NULL guard makes a concurrent second clock-out a no-op
+        hours = round(hours, 2)
+        lat, lon = coords or (None, None)
+        updated = cls.query.filter(cls.id == shift.id, cls.clock_out.is_(None)).update(
+            {"clock_out": when, "location_out": location, "total_hours": hours, "lat_out": lat, "lon_out": lon},
+            synchronize_session=False,
+        )
+        if not updated:
+            db.session.rollback()
+            return None
+
+        AttendanceDaily.bump(day, total_hours=hours, open_shifts=-1)
+        AttendanceUserMonthly.bump(user_id, day, total_hours=hours, open_shifts=-1)
+        db.session.commit()
+        return shift.id
+
+
+def late_cutoff():
+    """SHIFT_LATE_AFTER ('HH:MM', IST) as a time."""
+    return datetime.strptime(current_app.config.get('SHIFT_LATE_AFTER', '09:30'), '%H:%M').time()
+
+
+def is_late(clock_in, cutoff=None):
+    """True when the IST wall-clock clock-in time is after the late cutoff."""
+    if clock_in.tzinfo is not None:
+        clock_in = clock_in.astimezone(IST)
+    return clock_in.time() > (cutoff or late_cutoff())
+
+
+class AttendanceDaily(RollupMixin, db.Model):
+    """Company-wide attendance totals per day, maintained on every clock-in/clock-out."""
+    __tablename__ = "attendance_daily"
+
+    date = db.Column(db.Date, primary_key=True)
+    headcount = db.Column(db.Integer, nullable=False, default=0)
+    total_hours = db.Column(db.Float, nullable=False, default=0.0)
+    late_arrivals = db.Column(db.Integer, nullable=False, default=0)
+    # Shifts without a clock-out: still active today, missed clock-outs for past days
+    open_shifts = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bump(cls, day, **deltas):
+        cls._bump({"date": day}, deltas)
+
+
+class AttendanceUserMonthly(RollupMixin, db.Model):
+    """Per-employee attendance totals per month (month = first day of the month)."""
+    __tablename__ = "attendance_user_monthly"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)
+    days_present = db.Column(db.Integer, nullable=False, default=0)
+    total_hours = db.Column(db.Float, nullable=False, default=0.0)
+    late_arrivals = db.Column(db.Integer, nullable=False, default=0)
+    open_shifts = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def bump(cls, user_id, day, **deltas):
+        cls._bump({"user_id": user_id, "month": day.replace(day=1)}, deltas)
+
+
+class AttendanceArchive(db.Model):
+    """
+    Closed months moved out of the hot `attendance` table by archive_attendance.py.
+    Natively range-partitioned by month on Postgres (one partition per archived
+    month, created on demand); a plain table elsewhere.
+    """
+    __tablename__ = "attendance_archive"
+
+    # Keeps the original attendance id; Postgres needs the partition key in the primary key
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    date = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    clock_in = db.Column(db.DateTime, nullable=False)
+    clock_out = db.Column(db.DateTime, nullable=True)
+    total_hours = db.Column(db.Float, default=0.0)
+    location = db.Column(db.String(255))
+    location_out = db.Column(db.String(255))
+    lat_in = db.Column(db.Float)
+    lon_in = db.Column(db.Float)
+    lat_out = db.Column(db.Float)
+    lon_out = db.Column(db.Float)
+    site = db.Column(db.String(100))
+    auto_closed = db.Column(db.Boolean, default=False)
+    needs_review = db.Column(db.Boolean, default=False)
+
+    __table_args__ = (
+        db.Index('ix_attendance_archive_user_date', 'user_id', 'date'),
+        db.Index('ix_attendance_archive_date_id', 'date', 'id'),
+        db.Index('ix_attendance_archive_site_date', 'site', 'date'),
+        {'postgresql_partition_by': 'RANGE (date)'},
+    )
+
+
+class ShiftCloseRun(db.Model):
+    """Audit log of the end-of-day job that closes missed shifts."""
+    __tablename__ = "shift_close_runs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    target_date = db.Column(db.Date, nullable=False)
+    policy = db.Column(db.String(20), nullable=False)  # cap, flag
+    rows_closed = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class GeocodeCacheEntry(db.Model):
+    """Persistent tier of the reverse-geocoding cache (see attendance/geocoding.py)."""
+    __tablename__ = "geocode_cache"
+
+    # Quantized "lat,lon" grid cell, e.g. "28.6139,77.2090"
+    cell = db.Column(db.String(64), primary_key=True)
+    address = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
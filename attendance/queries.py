@@ -0,0 +1,199 @@
+from datetime import datetime
+
+import pytz
+from sqlalchemy import and_, case, func, literal_column, or_, select, union_all
+
+from extensions import db
+from accounts.models import User
+from attendance.models import Attendance, AttendanceArchive
+from attendance.archive import hot_floor
+
+IST = pytz.timezone('Asia/Kolkata')
+
+PER_PAGE = 50
+STATUSES = ("Active", "Missed", "Completed")
+
+
+def format_hms(total_seconds):
+    """Seconds -> '8h 5m 12s'; None means there is no duration to show."""
+    if total_seconds is None:
+        return "N/A"
+    total_seconds = max(int(total_seconds), 0)
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}h {minutes}m {seconds}s"
+
+
+def calculate_hms(dt_in, dt_out):
+    """Duration between two datetimes, ignoring any tzinfo on either side."""
+    if not dt_in or not dt_out:
+        return "N/A"
+    diff = dt_out.replace(tzinfo=None) - dt_in.replace(tzinfo=None)
+    return format_hms(diff.total_seconds())
+
+
+def seconds_between(start, end):
+    """Dialect-specific SQL for the number of seconds from `start` to `end`."""
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400
+    return func.timestampdiff(literal_column("SECOND"), start, end)
+
+
+def status_and_duration(t=Attendance.__table__):
+    """
+    SQL expressions for the listing status and duration in seconds over the
+    columns of `t`. Open shifts are Active (timed against now) today and
+    Missed (no duration) on earlier days.
+    """
+    now_ist = datetime.now(IST)
+    if db.engine.dialect.name == "sqlite":
+        # SQLite stores the IST wall-clock time without an offset
+        now = now_ist.replace(tzinfo=None)
+    else:
+        now = func.now()
+
+    today = now_ist.date()
+    status = case(
+        (t.c.clock_out.isnot(None), "Completed"),
+        (t.c.date == today, "Active"),
+        else_="Missed",
+    )
+    duration = case(
+        (t.c.clock_out.isnot(None), seconds_between(t.c.clock_in, t.c.clock_out)),
+        (t.c.date == today, seconds_between(t.c.clock_in, now)),
+        else_=None,
+    )
+    return status, duration
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
+
+def parse_cursor(cursor):
+    """Cursor format is '<YYYY-MM-DD>_<id>' of the last row on the previous page."""
+    try:
+        day, row_id = cursor.split("_")
+        return datetime.strptime(day, "%Y-%m-%d").date(), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def make_cursor(log):
+    return f"{log.date.isoformat()}_{log.id}"
+
+
+def read_filters(args):
+    """Pulls the listing filters out of request.args, dropping anything invalid."""
+    status = args.get("status")
+    return {
+        "start": parse_date(args.get("start")),
+        "end": parse_date(args.get("end")),
+        "email": (args.get("email") or "").strip(),
+        "status": status if status in STATUSES else None,
+        "site": (args.get("site") or "").strip(),
+    }
+
+
+LISTING_COLUMNS = ("id", "user_id", "date", "clock_in", "clock_out",
+                   "location", "location_out", "site", "auto_closed", "needs_review")
+
+
+def _page_branch(table, filters, user_id, position, limit):
+    """
+    One table's share of a listing page: every filter, the keyset position
+    and the LIMIT are pushed into the branch so each table is read through
+    its own (date, id) index.
+    """
+    t = table
+    conds = []
+    if user_id is not None:
+        conds.append(t.c.user_id == user_id)
+    if filters.get("start"):
+        conds.append(t.c.date >= filters["start"])
+    if filters.get("end"):
+        conds.append(t.c.date <= filters["end"])
+    if filters.get("email"):
+        conds.append(t.c.user_id.in_(select(User.id).where(User.email.ilike(f"{filters['email']}%"))))
+    if filters.get("site"):
+        conds.append(t.c.site == filters["site"])
+
+    # Spelled out rather than filtering on the CASE so the indexes stay usable
+    today = datetime.now(IST).date()
+    if filters.get("status") == "Completed":
+        conds.append(t.c.clock_out.isnot(None))
+    elif filters.get("status") == "Active":
+        conds.extend([t.c.clock_out.is_(None), t.c.date == today])
+    elif filters.get("status") == "Missed":
+        conds.extend([t.c.clock_out.is_(None), t.c.date < today])
+
+    if position:
+        day, row_id = position
+        conds.append(or_(t.c.date < day, and_(t.c.date == day, t.c.id < row_id)))
+
+    return (
+        select(*(t.c[name] for name in LISTING_COLUMNS))
+        .where(*conds)
+        .order_by(t.c.date.desc(), t.c.id.desc())
+        .limit(limit)
+    )
+
+
+def reaches_archive(filters):
+    """The archive is only read when the requested range starts before the hot table does."""
+    floor = hot_floor()
+    return floor is None or not filters.get("start") or filters["start"] < floor
+
+
+def attendance_page(filters, cursor=None, user_id=None, per_page=PER_PAGE):
+    """
+    One keyset page ordered by (date, id) descending, read transparently
+    across the hot table and the archive. Rows are lightweight named tuples
+    (not ORM objects) carrying the user's email plus the listing status and
+    duration_seconds computed in SQL.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    position = parse_cursor(cursor)
+    branches = [_page_branch(Attendance.__table__, filters, user_id, position, per_page + 1)]
+    if reaches_archive(filters):
+        branches.append(_page_branch(AttendanceArchive.__table__, filters, user_id, position, per_page + 1))
+
+    # Each branch is wrapped so its ORDER BY/LIMIT survives the UNION ALL
+    src = union_all(*(select(b.subquery()) for b in branches)).subquery("att")
+    status, duration = status_and_duration(src)
+
+    query = select(
+        *(src.c[name] for name in LISTING_COLUMNS),
+        User.email,
+        status.label("status"),
+        duration.label("duration_seconds"),
+    ).join(User, User.id == src.c.user_id).order_by(src.c.date.desc(), src.c.id.desc()).limit(per_page + 1)
+
+    rows = db.session.execute(query).all()
+    next_cursor = make_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
+
+
+def site_headcounts(day):
+    """
+    [(site, clocked_in, still_open)] for one day, busiest site first; site is
+    None for clock-ins outside every geofence.
+    """
+    counts = {}
+    for model in (Attendance, AttendanceArchive) if reaches_archive({"start": day}) else (Attendance,):
+        rows = db.session.execute(
+            select(model.site, func.count(), func.sum(case((model.clock_out.is_(None), 1), else_=0)))
+            .where(model.date == day)
+            .group_by(model.site)
+        ).all()
+        for site, total, still_open in rows:
+            prev = counts.get(site, (0, 0))
+            counts[site] = (prev[0] + total, prev[1] + still_open)
+    return sorted(((site, total, still_open) for site, (total, still_open) in counts.items()),
+                  key=lambda row: (row[0] is None, -row[1]))
@@ -0,0 +1,76 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import delete, select
+
+from extensions import db
+from attendance.models import (
+    Attendance, AttendanceArchive, AttendanceDaily, AttendanceUserMonthly, is_late, late_cutoff,
+)
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return date(day.year + (day.month == 12), day.month % 12 + 1, 1)
+
+
+def rebuild_rollups(start, end):
+    """
+    Recomputes the daily and per-employee monthly rollups from raw punches in
+    both the hot table and the archive. The range is widened to whole months
+    so monthly rows are never partial.
+    Returns (days, user_months) written.
+    """
+    start, end = month_start(start), next_month(end)
+
+    daily = defaultdict(lambda: {"headcount": 0, "total_hours": 0.0, "late_arrivals": 0, "open_shifts": 0})
+    monthly = defaultdict(lambda: {"days_present": 0, "total_hours": 0.0, "late_arrivals": 0, "open_shifts": 0})
+
+    cutoff = late_cutoff()
+    rows = (
+        row
+        for model in (Attendance, AttendanceArchive)
+        for row in db.session.execute(
+            select(
+                model.user_id, model.date, model.clock_in, model.clock_out, model.total_hours,
+            ).where(model.date >= start, model.date < end),
+            execution_options={"yield_per": 5000},
+        )
+    )
+
+    for row in rows:
+        late = int(bool(row.clock_in) and is_late(row.clock_in, cutoff))
+        is_open = int(row.clock_out is None)
+        hours = row.total_hours or 0.0
+
+        d = daily[row.date]
+        d["headcount"] += 1
+        d["total_hours"] += hours
+        d["late_arrivals"] += late
+        d["open_shifts"] += is_open
+
+        m = monthly[(row.user_id, month_start(row.date))]
+        m["days_present"] += 1
+        m["total_hours"] += hours
+        m["late_arrivals"] += late
+        m["open_shifts"] += is_open
+
+    db.session.execute(delete(AttendanceDaily).where(AttendanceDaily.date >= start, AttendanceDaily.date < end))
+    db.session.execute(delete(AttendanceUserMonthly).where(
+        AttendanceUserMonthly.month >= start, AttendanceUserMonthly.month < end
+    ))
+    if daily:
+        db.session.execute(
+            AttendanceDaily.__table__.insert(),
+            [{"date": day, **totals} for day, totals in daily.items()],
+        )
+    if monthly:
+        db.session.execute(
+            AttendanceUserMonthly.__table__.insert(),
+            [{"user_id": user_id, "month": month, **totals} for (user_id, month), totals in monthly.items()],
+        )
+    db.session.commit()
+    return len(daily), len(monthly)
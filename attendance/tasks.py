@@ -0,0 +1,97 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+
+from extensions import db
+from attendance.models import Attendance
+from attendance.geocoding import parse_coords, resolve_address
+
+# Columns a background job is allowed to fill in
+LOCATION_COLUMNS = ("location", "location_out")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=app.config.get("GEOCODE_WORKERS", 2),
+                    thread_name_prefix="geocode",
+                )
+    return _executor
+
+
+def enqueue_location(attendance_id, column, coords_str):
+    """
+    Schedules reverse geocoding for an attendance row that was saved with the
+    raw 'Lat: X, Lon: Y' string. Call this after the INSERT/UPDATE commits.
+    With GEOCODE_ASYNC off (tests, scripts) the job runs inline instead.
+    """
+    if column not in LOCATION_COLUMNS or parse_coords(coords_str) is None:
+        return
+
+    app = current_app._get_current_object()
+    if not app.config.get("GEOCODE_ASYNC", True):
+        _resolve_job(app, attendance_id, column, coords_str)
+        return
+    _get_executor(app).submit(_resolve_job, app, attendance_id, column, coords_str)
+
+
+def _resolve_job(app, attendance_id, column, coords_str):
+    max_retries = app.config.get("GEOCODE_MAX_RETRIES", 3)
+    backoff = app.config.get("GEOCODE_RETRY_BACKOFF", 2.0)
+    lat, lon = parse_coords(coords_str)
+
+    with app.app_context():
+        for attempt in range(max_retries + 1):
+            try:
+                address = resolve_address(lat, lon)
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    print(f"Geocoding gave up for attendance #{attendance_id}: {e}")
+                    return
+                time.sleep(backoff * (2 ** attempt))
+
+        if not address:
+            return
+
+        # Only overwrite the raw coordinates; never clobber a value written since
+        col = getattr(Attendance, column)
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(Attendance)
+                .where(Attendance.id == attendance_id, col == coords_str)
+                .values({column: address[:255]})
+            )
+
+
+def resolve_pending_locations(days=2):
+    """
+    Re-enqueues rows from the last `days` days that still hold raw
+    coordinates, e.g. jobs lost when a worker restarted. Returns the count.
+    """
+    since = (datetime.now() - timedelta(days=days)).date()
+    rows = db.session.execute(
+        select(Attendance.id, Attendance.location, Attendance.location_out).where(
+            Attendance.date >= since,
+            or_(Attendance.location.like("Lat:%"), Attendance.location_out.like("Lat:%")),
+        )
+    ).all()
+
+    queued = 0
+    for row in rows:
+        for column in LOCATION_COLUMNS:
+            value = getattr(row, column)
+            if value and value.startswith("Lat:"):
+                enqueue_location(row.id, column, value)
+                queued += 1
+    return queued
@@ -0,0 +1,121 @@
+"""
+SQL statements and latency per accounts.dashboard load, before and after
+dashboard_counters, on a throwaway SQLite database.
+
+    python -m benchmarks.dashboard_queries --users 500 --requests 200
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+
+def legacy_dashboard_stats(db, user_id, Attendance, Task, LegacyLeaveRequest):
+    """The three per-load queries the dashboard used to run."""
+    from sqlalchemy import func
+    Attendance.query.filter_by(user_id=user_id, clock_out=None).first()
+    Task.query.filter_by(user_id=user_id, status='Pending').count()
+    db.session.query(func.sum(LegacyLeaveRequest.days_requested)).filter(
+        LegacyLeaveRequest.user_id == user_id,
+        LegacyLeaveRequest.status == 'Approved'
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="dashboard_bench_")
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    # Imported late so the app picks up the throwaway database
+    from sqlalchemy import event
+    from app import app
+    from extensions import db
+    from accounts.models import User, Task, LeaveRequest as LegacyLeaveRequest
+    from accounts.counters import rebuild_dashboard_counters
+    from attendance.models import Attendance
+    from grievances.models import Grievance
+    from leaves.models import LeaveRequest
+    from leaves.ledger import reconcile_ledger
+    from payslips.models import Notification
+
+    rng = random.Random(11)
+    today = date.today()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {"email": f"emp{i}@example.com", "password_hash": "x", "role": "employee", "is_active": True}
+            for i in range(args.users)
+        ])
+        db.session.execute(Task.__table__.insert(), [
+            {"title": "t", "status": rng.choice(["Pending", "Completed"]), "user_id": rng.randint(1, args.users)}
+            for _ in range(args.users * 20)
+        ])
+        db.session.execute(LegacyLeaveRequest.__table__.insert(), [
+            {"user_id": rng.randint(1, args.users), "days_requested": rng.randint(1, 3), "status": "Approved"}
+            for _ in range(args.users * 5)
+        ])
+        owners = [rng.randrange(args.users) for _ in range(args.users * 3)]
+        db.session.execute(Grievance.__table__.insert(), [
+            {"title": "g", "description": "d", "category": "General", "status": rng.choice(["Open", "Resolved"]),
+             "created_by": f"emp{i}@example.com", "user_id": i + 1}
+            for i in owners
+        ])
+        recipients = [rng.randrange(args.users) for _ in range(args.users * 10)]
+        db.session.execute(Notification.__table__.insert(), [
+            {"user": f"emp{i}@example.com", "user_id": i + 1, "message": "m", "is_read": rng.random() < 0.5}
+            for i in recipients
+        ])
+        leaves = []
+        for _ in range(args.users * 5):
+            start = today - timedelta(days=rng.randrange(300))
+            leaves.append({"user_id": rng.randint(1, args.users), "leave_type": "Casual", "start_date": start,
+                           "end_date": start + timedelta(days=rng.randrange(3)), "status": "Approved"})
+        db.session.execute(LeaveRequest.__table__.insert(), leaves)
+        db.session.execute(Attendance.__table__.insert(), [
+            {"user_id": u, "date": today, "clock_in": datetime.now()} for u in range(1, args.users + 1, 2)
+        ])
+        db.session.commit()
+        rebuild_dashboard_counters()
+        reconcile_ledger()
+
+        statements = []
+        event.listen(db.engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+        user_ids = [rng.randint(1, args.users) for _ in range(args.requests)]
+        statements.clear()
+        start = time.perf_counter()
+        for user_id in user_ids:
+            legacy_dashboard_stats(db, user_id, Attendance, Task, LegacyLeaveRequest)
+            db.session.rollback()
+        legacy_s = time.perf_counter() - start
+        legacy_queries = len(statements) / args.requests
+
+    client = app.test_client()
+    with app.app_context():
+        user = db.session.get(User, 1)
+        user.set_password("x")
+        db.session.commit()
+    client.post("/accounts/login", data={"email": "emp0@example.com", "password": "x", "role": "employee"})
+    client.get("/accounts/dashboard")  # warm the user cache and template
+
+    statements.clear()
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        client.get("/accounts/dashboard")
+    page_s = time.perf_counter() - start
+    page_queries = len(statements) / args.requests
+
+    print(f"users={args.users} requests={args.requests}")
+    print(f"before: stats queries/load {legacy_queries:4.1f}  ({legacy_s / args.requests * 1000:6.2f} ms for the stats alone)")
+    print(f"after : SQL statements per full dashboard request {page_queries:4.1f}  ({page_s / args.requests * 1000:6.2f} ms per request)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Offline gazetteer lookups vs. a linear scan vs. the Nominatim network path.
+
+    python -m benchmarks.geocoding --places 500 --queries 20000
+    python -m benchmarks.geocoding --network 5     # also time 5 real Nominatim calls
+"""
+import argparse
+import math
+import random
+import time
+
+from attendance.gazetteer import Gazetteer, EARTH_RADIUS_KM
+from attendance.geocoding import fetch_address
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def random_point(rng):
+    # Roughly the Indian subcontinent, where the offices are
+    return rng.uniform(8.0, 35.0), rng.uniform(68.0, 97.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--places", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--network", type=int, default=0, help="number of live Nominatim calls to time")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    places = [(f"Site {i}", *random_point(rng)) for i in range(args.places)]
+    queries = [random_point(rng) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer(places)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    tree_results = [gazetteer.nearest(lat, lon)[0] for lat, lon in queries]
+    tree_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scan_results = [
+        min(places, key=lambda p: haversine_km(lat, lon, p[1], p[2]))[0]
+        for lat, lon in queries
+    ]
+    scan_s = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(tree_results, scan_results))
+    print(f"places={args.places} queries={args.queries} build={build_ms:.1f} ms")
+    print(f"kd-tree     : {tree_s / args.queries * 1e6:8.1f} us/query")
+    print(f"linear scan : {scan_s / args.queries * 1e6:8.1f} us/query  (mismatches: {mismatches})")
+
+    if args.network:
+        start = time.perf_counter()
+        for lat, lon in queries[:args.network]:
+            try:
+                fetch_address(lat, lon)
+            except Exception as e:
+                print(f"network error: {e}")
+            time.sleep(1)  # Nominatim usage policy: max 1 request/second
+        network_s = time.perf_counter() - start - args.network
+        print(f"nominatim   : {network_s / args.network * 1e6:8.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
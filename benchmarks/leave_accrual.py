@@ -0,0 +1,63 @@
+"""
+Monthly leave accrual over a large workforce on a throwaway SQLite database:
+one vectorized pass plus one bulk upsert, then an idempotent re-run.
+
+    python -m benchmarks.leave_accrual --employees 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--year", type=int, default=2026)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="accrual_bench_")
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ["LEAVE_ACCRUAL"] = "monthly"
+
+    # Imported late so the app picks up the throwaway database
+    from app import app
+    from extensions import db
+    from accounts.models import User, EmployeeProfile
+    from leaves.models import LeaveBalance
+    from leaves.accrual import run_accrual
+
+    rng = random.Random(5)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {"email": f"emp{i}@example.com", "password_hash": "x", "role": "employee", "is_active": True}
+            for i in range(args.employees)
+        ])
+        db.session.execute(EmployeeProfile.__table__.insert(), [
+            {"user_id": i + 1, "joining_date": date(args.year - 3, 1, 1) + timedelta(days=rng.randrange(4 * 365))}
+            for i in range(args.employees)
+        ])
+        db.session.commit()
+
+        timings = []
+        for month in range(1, 13):
+            start = time.perf_counter()
+            run_accrual(args.year, month)
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        df = run_accrual(args.year, 12)
+        rerun_s = time.perf_counter() - start
+        rows = db.session.query(LeaveBalance).count()
+
+    print(f"employees={args.employees} ledger rows={rows}")
+    print(f"first month (inserts): {timings[0]:6.2f} s   later months: {sum(timings[1:]) / 11:6.2f} s avg")
+    print(f"re-run of December   : {rerun_s:6.2f} s   rows changed: {int(df['changed'].sum())}")
+
+
+if __name__ == "__main__":
+    main()
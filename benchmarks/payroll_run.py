@@ -0,0 +1,76 @@
+"""
+Month-end payroll run (payroll.process_all_salaries) on a throwaway SQLite
+database: the old per-employee lookup loop vs. the set-based INSERT ... SELECT.
+
+    python -m benchmarks.payroll_run --employees 10000 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def legacy_run(db, User, PayrollRecord, month):
+    """The loop process_all_salaries used to run: one lookup per employee."""
+    added = skipped = 0
+    for emp in User.query.filter_by(role='employee').all():
+        if not PayrollRecord.query.filter_by(user_id=emp.id, month=month).first():
+            basic, allow = 5000.0, 500.0
+            deduct = basic * 0.17
+            db.session.add(PayrollRecord(
+                user_id=emp.id, month=month, basic_salary=basic, allowances=allow,
+                deductions=deduct, net_salary=basic + allow - deduct, status="Processed",
+            ))
+            added += 1
+        else:
+            skipped += 1
+    db.session.commit()
+    return added, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="payroll_bench_")
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    # Imported late so the app picks up the throwaway database
+    from app import app
+    from extensions import db
+    from accounts.models import User
+    from payroll.models import PayrollRecord
+    from payroll.runs import process_month
+
+    def set_based_run(month):
+        added, skipped = process_month(month)
+        db.session.commit()
+        return added, skipped
+
+    with app.app_context():
+        db.create_all()
+        have = 0
+        for n in sorted(args.employees):
+            # Each size tops the same database up with more employees
+            db.session.execute(User.__table__.insert(), [
+                {"email": f"emp{i}@example.com", "password_hash": "x", "role": "employee", "is_active": True}
+                for i in range(have, n)
+            ])
+            db.session.commit()
+            have = n
+
+            print(f"employees={n}")
+            for label, run in (("legacy loop", lambda m: legacy_run(db, User, PayrollRecord, m)),
+                               ("INSERT ... SELECT", set_based_run)):
+                month = f"{label} {n}"
+                for attempt in ("first run", "re-run"):
+                    start = time.perf_counter()
+                    added, skipped = run(month)
+                    print(f"  {label:<18} {attempt:<9} {time.perf_counter() - start:8.2f} s   "
+                          f"added={added:<6} skipped={skipped}")
+                db.session.expunge_all()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Throughput of the badge-punch importer on a throwaway SQLite database.
+
+    python -m benchmarks.punch_import --punches 1000000 --employees 2000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def write_punches(path, punches, employees, days):
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1)
+    with open(path, "w", newline="") as f:
+        f.write("email,timestamp,device\n")
+        for _ in range(punches):
+            day = start + timedelta(days=rng.randrange(days))
+            stamp = day + timedelta(seconds=rng.randrange(8 * 3600, 20 * 3600))
+            f.write(f"emp{rng.randrange(employees)}@example.com,{stamp.isoformat(sep=' ')},Gate {rng.randrange(4)}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--punches", type=int, default=1000000)
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=250)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="punch_bench_")
+    os.environ["DB_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench")
+
+    # Imported late so the app picks up the throwaway database
+    from app import app
+    from extensions import db
+    from accounts.models import User
+    from attendance.importer import import_punches, pair_punches
+
+    csv_path = os.path.join(workdir, "punches.csv")
+    write_punches(csv_path, args.punches, args.employees, args.days)
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {"email": f"emp{i}@example.com", "password_hash": "x", "role": "employee", "is_active": True}
+            for i in range(args.employees)
+        ])
+        db.session.commit()
+
+        start = time.perf_counter()
+        with open(csv_path, newline="") as f:
+            pair_punches(f)
+        pair_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(csv_path, newline="") as f:
+            stats = import_punches(f)
+        total_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(csv_path, newline="") as f:
+            again = import_punches(f)
+        rerun_s = time.perf_counter() - start
+
+    print(f"punches={stats['punches']} shifts={stats['shifts']} inserted={stats['inserted']}")
+    print(f"parse + pair    : {pair_s:6.2f} s  ({stats['punches'] / pair_s:,.0f} punches/s)")
+    print(f"full import     : {total_s:6.2f} s  ({stats['punches'] / total_s:,.0f} punches/s)")
+    print(f"re-import (dups): {rerun_s:6.2f} s  duplicates={again['duplicates']} inserted={again['inserted']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import argparse
+from datetime import datetime
+import pytz
+from app import app
+from attendance.batch import CLOSE_POLICIES, close_missed_shifts, stale_shift_dates
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Nightly cron entry point, e.g.:  30 0 * * *  python close_missed_shifts.py
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Close shifts that were never clocked out.")
+    parser.add_argument("--date", help="YYYY-MM-DD; default: every day before today with open shifts")
+    parser.add_argument("--policy", choices=CLOSE_POLICIES, help="default: MISSED_SHIFT_POLICY")
+    args = parser.parse_args()
+
+    with app.app_context():
+        policy = args.policy or app.config['MISSED_SHIFT_POLICY']
+        if args.date:
+            days = [datetime.strptime(args.date, "%Y-%m-%d").date()]
+        else:
+            days = stale_shift_dates(datetime.now(IST).date())
+
+        total = 0
+        for day in days:
+            closed = close_missed_shifts(day, policy)
+            total += closed
+            print(f"{day}: closed {closed} shift(s) [{policy}]")
+        print(f"Done. {total} shift(s) closed. ✅")
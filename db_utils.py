@@ -0,0 +1,66 @@
+# COMPANY_PORTAL/db_utils.py
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from extensions import db
+
+
+def insert_ignore(model, index_elements):
+    """
+    INSERT into a model or Table that silently skips rows violating the unique key on `index_elements`:
+    ON CONFLICT DO NOTHING on Postgres/SQLite, INSERT IGNORE on MySQL.
+    Returns a statement; attach rows with .values(...) or pass a list to execute().
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    return insert(model).prefix_with("IGNORE")
+
+
+def upsert(model, index_elements, update_columns):
+    """
+    INSERT into a model or Table that overwrites `update_columns` on rows already present under the
+    unique key on `index_elements`: ON CONFLICT DO UPDATE on Postgres/SQLite, ON DUPLICATE KEY UPDATE on MySQL.
+    Returns a statement; pass a list of rows to execute() for a bulk upsert.
+    """
+    dialect = db.engine.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(model)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements, set_={col: stmt.excluded[col] for col in update_columns}
+        )
+    stmt = mysql.insert(model)
+    return stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+
+
+class RollupMixin:
+    """Counter rows that are created on first touch and then only incremented."""
+
+    @classmethod
+    def _bump(cls, key, deltas):
+        db.session.execute(insert_ignore(cls, list(key)).values(**key))
+        db.session.execute(
+            update(cls)
+            .where(*(getattr(cls, col) == val for col, val in key.items()))
+            .values({col: getattr(cls, col) + delta for col, delta in deltas.items()})
+        )
+
+    @classmethod
+    def bump_many(cls, key_cols, rows):
+        """
+        Batch form of bump for imports: `rows` are dicts holding the key columns
+        plus one delta per counter. Two executemany round trips in total.
+        """
+        if not rows:
+            return
+        table = cls.__table__
+        counters = [col for col in rows[0] if col not in key_cols]
+        conn = db.session.connection()
+        conn.execute(insert_ignore(table, key_cols), [{k: row[k] for k in key_cols} for row in rows])
+        conn.execute(
+            update(table)
+            .where(*(table.c[k] == bindparam(f"key_{k}") for k in key_cols))
+            .values({c: table.c[c] + bindparam(f"delta_{c}") for c in counters}),
+            [{**{f"key_{k}": row[k] for k in key_cols}, **{f"delta_{c}": row[c] for c in counters}} for row in rows],
+        )
@@ -1,4 +1,5 @@
 from extensions import db
+from db_utils import RollupMixin
 from datetime import datetime
 
 class Grievance(db.Model):
@@ -15,8 +16,37 @@ class Grievance(db.Model):
     hr_comment = db.Column(db.Text)
     resolved_at = db.Column(db.DateTime)
     
-    created_by = db.Column(db.String(100), nullable=False)
+    created_by = db.Column(db.String(100), nullable=False)  # Submitter's email at the time, for display
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))  # Owner; NULL only for legacy rows with no matching user
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # HR inbox: status tabs and date-ordered pages (see grievances/queries.py)
+    __table_args__ = (
+        db.Index('ix_grievances_status_created', 'status', 'created_at'),
+        db.Index('ix_grievances_created_at', 'created_at'),
+        db.Index('ix_grievances_user_id', 'user_id', 'id'),
+    )
+
     def __repr__(self):
-        return f"<Grievance {self.id}>"
\ No newline at end of file
+        return f"<Grievance {self.id}>"
+
+
+class GrievanceDailyStats(RollupMixin, db.Model):
+    """
+    Per-category, per-day (IST) grievance totals behind the SLA report,
+    moved by grievances.stats on every add, resolve and delete.
+    """
+    __tablename__ = "grievance_daily_stats"
+
+    category = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    opened = db.Column(db.Integer, nullable=False, default=0)
+    # Tickets opened on `day` that are still Open; their age is today - day
+    still_open = db.Column(db.Integer, nullable=False, default=0)
+    # Tickets closed (Resolved or Rejected) on `day`, and their summed open-to-close time
+    closed = db.Column(db.Integer, nullable=False, default=0)
+    resolution_seconds = db.Column(db.Float, nullable=False, default=0.0)
+
+    @classmethod
+    def bump(cls, category, day, **deltas):
+        cls._bump({"category": category, "day": day}, deltas)
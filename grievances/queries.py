@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select
+
+from extensions import db
+from grievances.models import Grievance
+
+PER_PAGE = 50
+STATUSES = ("Open", "Resolved", "Rejected")
+CATEGORIES = ("Payroll", "Work Environment", "Policy Violation", "Harassment", "Technical", "Other", "General")
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
+
+def parse_cursor(cursor):
+    """Cursor format is '<created_at ISO>_<id>' of the last row on the previous page."""
+    try:
+        stamp, row_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(stamp), int(row_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def make_cursor(g):
+    return f"{g.created_at.isoformat()}_{g.id}"
+
+
+def read_filters(args):
+    """Pulls the inbox filters out of request.args, dropping anything invalid."""
+    status, category = args.get("status"), args.get("category")
+    return {
+        "status": status if status in STATUSES else None,
+        "category": category if category in CATEGORIES else None,
+        "start": parse_date(args.get("start")),
+        "end": parse_date(args.get("end")),
+    }
+
+
+def filter_conditions(filters):
+    """WHERE terms for every filter but status, which the counts group on instead."""
+    conds = []
+    if filters.get("category"):
+        conds.append(Grievance.category == filters["category"])
+    if filters.get("start"):
+        conds.append(Grievance.created_at >= filters["start"])
+    if filters.get("end"):
+        conds.append(Grievance.created_at < filters["end"] + timedelta(days=1))
+    return conds
+
+
+def status_counts(filters):
+    """{status: count, ..., 'All': total} under the non-status filters, from one GROUP BY."""
+    rows = db.session.execute(
+        select(Grievance.status, func.count()).where(*filter_conditions(filters)).group_by(Grievance.status)
+    ).all()
+    counts = {status: 0 for status in STATUSES}
+    counts.update({status: n for status, n in rows})
+    counts["All"] = sum(n for _, n in rows)
+    return counts
+
+
+def grievance_page(filters, cursor=None, per_page=PER_PAGE):
+    """
+    One keyset page ordered by (created_at, id) descending, read through the
+    (status, created_at) / created_at indexes. Returns (rows, next_cursor);
+    next_cursor is None on the last page.
+    """
+    conds = filter_conditions(filters)
+    if filters.get("status"):
+        conds.append(Grievance.status == filters["status"])
+    position = parse_cursor(cursor)
+    if position:
+        stamp, row_id = position
+        conds.append(or_(Grievance.created_at < stamp, and_(Grievance.created_at == stamp, Grievance.id < row_id)))
+
+    rows = db.session.execute(
+        select(Grievance).where(*conds)
+        .order_by(Grievance.created_at.desc(), Grievance.id.desc())
+        .limit(per_page + 1)
+    ).scalars().all()
+    next_cursor = make_cursor(rows[per_page - 1]) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
@@ -1,8 +1,12 @@
 # grievances/routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
 from extensions import db
 from grievances.models import Grievance
+from grievances.queries import read_filters, status_counts, grievance_page, CATEGORIES
+from grievances.search import grievance_search
+from grievances.stats import record_opened, record_status_change, record_deleted
 from payslips.models import Notification
+from accounts.models import DashboardCounters
 from accounts.decorators import  role_required
 from flask_login import current_user, login_required
 from datetime import datetime
@@ -18,17 +22,51 @@ grievances_bp = Blueprint("grievances", __name__, url_prefix="/grievances")
 @login_required
 @role_required("hr")
 def list_grievances():
-    status_filter = request.args.get('status')
-    query = Grievance.query
-    if status_filter:
-        query = query.filter_by(status=status_filter)
-
-    total_count = Grievance.query.count()
-    pending_count = Grievance.query.filter_by(status='Open').count()
-    resolved_count = Grievance.query.filter_by(status='Resolved').count()
-    grievances = query.order_by(Grievance.id.desc()).all()
-    
-    return render_template("grievances/grievances.html", grievances=grievances, total_count=total_count, pending_count=pending_count, resolved_count=resolved_count)
+    # One GROUP BY for the tab counts plus one keyset page (or one ranked search page)
+    filters = read_filters(request.args)
+    q = (request.args.get('q') or '').strip()
+    counts = status_counts(filters)
+    if q:
+        grievances, next_cursor = grievance_search(q, filters, cursor=request.args.get('cursor'))
+    else:
+        grievances, next_cursor = grievance_page(filters, cursor=request.args.get('cursor'))
+
+    return render_template(
+        "grievances/grievances.html",
+        grievances=grievances,
+        filters=filters,
+        q=q,
+        categories=CATEGORIES,
+        next_cursor=next_cursor,
+        total_count=counts["All"],
+        pending_count=counts["Open"],
+        resolved_count=counts["Resolved"],
+        rejected_count=counts["Rejected"],
+    )
+
+@grievances_bp.route("/search")
+@login_required
+@role_required("hr")
+def search_grievances():
+    """?q=...[&status=&category=&start=&end=&cursor=] -> ranked matches as JSON."""
+    q = (request.args.get('q') or '').strip()
+    if not q:
+        return jsonify({"status": "error", "message": "q is required"}), 400
+    rows, next_cursor = grievance_search(q, read_filters(request.args), cursor=request.args.get('cursor'))
+    return jsonify({
+        "results": [
+            {
+                "id": g.id,
+                "title": g.title,
+                "category": g.category,
+                "status": g.status,
+                "created_by": g.created_by,
+                "created_at": g.created_at.isoformat() if g.created_at else None,
+            }
+            for g in rows
+        ],
+        "next_cursor": next_cursor,
+    })
 
 # ================= ADD NEW (Employee) =================
 @grievances_bp.route("/add", methods=["GET", "POST"])
@@ -41,9 +79,13 @@ def add_grievance():
             title=request.form["title"],
             category=category if category else "General",
             description=request.form["description"],
-            created_by=current_user.email # Use current_user
+            created_by=current_user.email, # Use current_user
+            user_id=current_user.id
         )
         db.session.add(g)
+        db.session.flush()  # created_at default, needed for the day bucket
+        DashboardCounters.bump(current_user.id, open_grievances=1)
+        record_opened(g)
         db.session.commit()
         flash("Grievance submitted successfully", "success")
         return redirect(url_for("accounts.dashboard"))
@@ -60,18 +102,25 @@ def resolve(id):
     new_status = request.form.get('status') # This will be 'Resolved' or 'Rejected'
     comment = request.form.get('hr_comment')
     
+    # Keep the submitter's open-grievance counter in step with the status change
+    old_status, old_resolved_at = grievance.status, grievance.resolved_at
+    was_open, now_open = old_status == 'Open', new_status == 'Open'
+    if was_open != now_open:
+        DashboardCounters.bump(grievance.user_id, open_grievances=1 if now_open else -1)
+
     # Update the grievance record
     grievance.status = new_status
     grievance.hr_comment = comment
     grievance.resolved_at = datetime.now(IST)
+    record_status_change(grievance, old_status, old_resolved_at)
     
     # Create notification with the new status
-    notification = Notification(
-        user=grievance.created_by,
-        message=f"Your grievance '{grievance.title}' has been {new_status.lower()} with HR feedback."
+    Notification.notify(
+        grievance.user_id,
+        grievance.created_by,
+        f"Your grievance '{grievance.title}' has been {new_status.lower()} with HR feedback."
     )
     
-    db.session.add(notification)
     db.session.commit()
     
     flash(f"Grievance marked as {new_status}", "success")
@@ -82,10 +131,13 @@ def resolve(id):
 @role_required("hr")
 def delete_grievance(id):
     grievance = Grievance.query.get_or_404(id)
+    if grievance.status == 'Open':
+        DashboardCounters.bump(grievance.user_id, open_grievances=-1)
+    record_deleted(grievance)
     db.session.delete(grievance)
     db.session.commit()
     flash("Grievance deleted successfully", "success")
-    return redirect(url_for("dashboard"))
+    return redirect(url_for("grievances.list_grievances"))
 
 
 
@@ -99,5 +151,5 @@ def delete_grievance(id):
 @login_required
 @role_required("employee")
 def my_requests():
-    my_grievances = Grievance.query.filter_by(created_by=current_user.email).order_by(Grievance.id.desc()).all()
+    my_grievances = Grievance.query.filter_by(user_id=current_user.id).order_by(Grievance.id.desc()).all()
     return render_template("grievances/my_request.html", my_grievances=my_grievances)
\ No newline at end of file
@@ -0,0 +1,124 @@
+import re
+
+from sqlalchemy import DDL, column, event, func, literal_column, or_, select, table, text
+
+from extensions import db
+from grievances.models import Grievance
+from grievances.queries import PER_PAGE, filter_conditions
+
+# Title matches outrank the description, which outranks HR's comment
+POSTGRES_INDEX = [
+    """
+    ALTER TABLE grievances ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(hr_comment, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_grievances_search ON grievances USING GIN (search_vector)",
+]
+
+# External-content FTS5 table kept in step with grievances by triggers
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS grievances_fts USING fts5(
+        title, description, hr_comment, content='grievances', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS grievances_fts_ai AFTER INSERT ON grievances BEGIN
+        INSERT INTO grievances_fts(rowid, title, description, hr_comment)
+        VALUES (new.id, new.title, new.description, new.hr_comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS grievances_fts_ad AFTER DELETE ON grievances BEGIN
+        INSERT INTO grievances_fts(grievances_fts, rowid, title, description, hr_comment)
+        VALUES ('delete', old.id, old.title, old.description, old.hr_comment);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS grievances_fts_au AFTER UPDATE OF title, description, hr_comment ON grievances BEGIN
+        INSERT INTO grievances_fts(grievances_fts, rowid, title, description, hr_comment)
+        VALUES ('delete', old.id, old.title, old.description, old.hr_comment);
+        INSERT INTO grievances_fts(rowid, title, description, hr_comment)
+        VALUES (new.id, new.title, new.description, new.hr_comment);
+    END
+    """,
+    # Picks up rows written before the triggers existed
+    "INSERT INTO grievances_fts(grievances_fts) VALUES ('rebuild')",
+]
+
+
+def ensure_search_index(conn):
+    """
+    Creates the full-text index for the connection's dialect; idempotent.
+    The index follows every write to grievances on its own (a generated
+    column on Postgres, triggers on SQLite), so the routes never touch it.
+    Other databases fall back to unindexed LIKE matching.
+    """
+    statements = {"postgresql": POSTGRES_INDEX, "sqlite": SQLITE_INDEX}.get(conn.dialect.name, [])
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+# Tables made by db.create_all() get the index straight away; migrate_db.py covers existing ones
+event.listen(Grievance.__table__, "after_create", lambda target, conn, **kw: ensure_search_index(conn))
+event.listen(Grievance.__table__, "before_drop", DDL("DROP TABLE IF EXISTS grievances_fts").execute_if(dialect="sqlite"))
+
+
+def fts5_query(q):
+    """User input -> FTS5 MATCH string: every word required, the last one as a prefix."""
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def grievance_search(q, filters, cursor=None, per_page=PER_PAGE):
+    """
+    Ranked full-text search over title, description and HR comment, with the
+    inbox filters applied on top. Pages by offset (rank order has no stable
+    keyset); the cursor is the offset of the next page. Returns (rows, next_cursor).
+    """
+    offset = int(cursor) if cursor and cursor.isdigit() else 0
+    conds = filter_conditions(filters)
+    if filters.get("status"):
+        conds.append(Grievance.status == filters["status"])
+
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", q)
+        vector = literal_column("grievances.search_vector")
+        query = (
+            select(Grievance)
+            .where(vector.op("@@")(tsquery), *conds)
+            .order_by(func.ts_rank_cd(vector, tsquery).desc(), Grievance.id.desc())
+        )
+    elif dialect == "sqlite":
+        match = fts5_query(q)
+        if match is None:
+            return [], None
+        fts = literal_column("grievances_fts")
+        fts_rows = table("grievances_fts", column("rowid"))
+        query = (
+            select(Grievance)
+            .join(fts_rows, fts_rows.c.rowid == Grievance.id)
+            .where(fts.op("MATCH")(match), *conds)
+            # bm25 is lower-is-better; weights mirror the Postgres A/B/C ranks
+            .order_by(func.bm25(fts, 10.0, 4.0, 1.0), Grievance.id.desc())
+        )
+    else:
+        pattern = f"%{q}%"
+        query = (
+            select(Grievance)
+            .where(or_(Grievance.title.ilike(pattern), Grievance.description.ilike(pattern),
+                       Grievance.hr_comment.ilike(pattern)), *conds)
+            .order_by(Grievance.id.desc())
+        )
+
+    rows = db.session.execute(query.offset(offset).limit(per_page + 1)).scalars().all()
+    next_cursor = str(offset + per_page) if len(rows) > per_page else None
+    return rows[:per_page], next_cursor
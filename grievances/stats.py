@@ -0,0 +1,132 @@
+from collections import defaultdict
+from datetime import timedelta
+
+import pytz
+from sqlalchemy import and_, case, delete, func, insert, select
+
+from extensions import db
+from grievances.models import Grievance, GrievanceDailyStats
+
+IST = pytz.timezone('Asia/Kolkata')
+
+# Open-ticket age buckets in days, inclusive: (label, youngest, oldest); None is unbounded
+AGING_BUCKETS = (("0-2 days", 0, 2), ("3-7 days", 3, 7), (">7 days", 8, None))
+
+
+def local_created(created_at):
+    """created_at is stored as naive UTC; the report works in IST wall-clock time."""
+    return pytz.utc.localize(created_at).astimezone(IST).replace(tzinfo=None)
+
+
+def local_resolved(resolved_at):
+    """resolved_at is written as an aware IST datetime and read back as naive IST wall-clock time."""
+    if resolved_at.tzinfo is not None:
+        return resolved_at.astimezone(IST).replace(tzinfo=None)
+    return resolved_at
+
+
+def _closure(g, resolved_at):
+    """(close day, open-to-close seconds) for a ticket closed at `resolved_at`."""
+    closed = local_resolved(resolved_at)
+    return closed.date(), max((closed - local_created(g.created_at)).total_seconds(), 0.0)
+
+
+def record_opened(g):
+    """After a grievance is added (created_at already set); the caller commits."""
+    GrievanceDailyStats.bump(g.category, local_created(g.created_at).date(), opened=1, still_open=1)
+
+
+def record_status_change(g, old_status, old_resolved_at):
+    """
+    After g.status/resolved_at changed from old_status/old_resolved_at;
+    the caller commits. Re-closing a closed ticket moves its closure to the
+    new day and duration.
+    """
+    was_open, now_open = old_status == "Open", g.status == "Open"
+    opened_day = local_created(g.created_at).date()
+    if was_open != now_open:
+        GrievanceDailyStats.bump(g.category, opened_day, still_open=1 if now_open else -1)
+    if not was_open and old_resolved_at is not None:
+        day, seconds = _closure(g, old_resolved_at)
+        GrievanceDailyStats.bump(g.category, day, closed=-1, resolution_seconds=-seconds)
+    if not now_open and g.resolved_at is not None:
+        day, seconds = _closure(g, g.resolved_at)
+        GrievanceDailyStats.bump(g.category, day, closed=1, resolution_seconds=seconds)
+
+
+def record_deleted(g):
+    """Before a grievance is deleted; takes it out of every day it counted on. The caller commits."""
+    opened_day = local_created(g.created_at).date()
+    GrievanceDailyStats.bump(g.category, opened_day, opened=-1, still_open=-int(g.status == "Open"))
+    if g.status != "Open" and g.resolved_at is not None:
+        day, seconds = _closure(g, g.resolved_at)
+        GrievanceDailyStats.bump(g.category, day, closed=-1, resolution_seconds=-seconds)
+
+
+def rebuild_grievance_stats():
+    """
+    Recomputes grievance_daily_stats from the grievances table, e.g. to seed
+    history or after a manual data fix. Returns the number of rows written.
+    """
+    days = defaultdict(lambda: {"opened": 0, "still_open": 0, "closed": 0, "resolution_seconds": 0.0})
+    for g in db.session.execute(
+        select(Grievance.category, Grievance.status, Grievance.created_at, Grievance.resolved_at)
+        .where(Grievance.created_at.isnot(None)),
+        execution_options={"yield_per": 5000},
+    ):
+        d = days[(g.category, local_created(g.created_at).date())]
+        d["opened"] += 1
+        if g.status == "Open":
+            d["still_open"] += 1
+        elif g.resolved_at is not None:
+            day, seconds = _closure(g, g.resolved_at)
+            c = days[(g.category, day)]
+            c["closed"] += 1
+            c["resolution_seconds"] += seconds
+
+    db.session.execute(delete(GrievanceDailyStats))
+    if days:
+        db.session.execute(insert(GrievanceDailyStats), [
+            {"category": category, "day": day, **values} for (category, day), values in days.items()
+        ])
+    db.session.commit()
+    return len(days)
+
+
+def sla_report(today, window_days=30):
+    """
+    Per category: open tickets by age bucket (all open tickets), plus tickets
+    opened/closed and mean hours to resolution over the last `window_days`.
+    Two GROUP BY queries over the daily rows; no grievance is loaded.
+    Returns [{category, buckets: {label: n}, open, opened, closed, mttr_hours}], most open first.
+    """
+    S = GrievanceDailyStats
+    bucket_cols = []
+    for label, youngest, oldest in AGING_BUCKETS:
+        conds = [S.day <= today - timedelta(days=youngest)]
+        if oldest is not None:
+            conds.append(S.day >= today - timedelta(days=oldest))
+        bucket_cols.append(func.sum(case((and_(*conds), S.still_open), else_=0)).label(label))
+
+    report = {}
+    for row in db.session.execute(
+        select(S.category, *bucket_cols).where(S.still_open != 0).group_by(S.category)
+    ).mappings():
+        buckets = {label: int(row[label] or 0) for label, _, _ in AGING_BUCKETS}
+        report[row["category"]] = {"buckets": buckets, "open": sum(buckets.values()),
+                                   "opened": 0, "closed": 0, "mttr_hours": None}
+
+    since = today - timedelta(days=window_days - 1)
+    empty = {label: 0 for label, _, _ in AGING_BUCKETS}
+    for category, opened, closed, seconds in db.session.execute(
+        select(S.category, func.sum(S.opened), func.sum(S.closed), func.sum(S.resolution_seconds))
+        .where(S.day >= since, S.day <= today)
+        .group_by(S.category)
+    ):
+        entry = report.setdefault(category, {"buckets": dict(empty), "open": 0, "mttr_hours": None})
+        entry["opened"], entry["closed"] = int(opened or 0), int(closed or 0)
+        if closed:
+            entry["mttr_hours"] = round(seconds / closed / 3600, 1)
+
+    return sorted(({"category": category, **entry} for category, entry in report.items()),
+                  key=lambda e: (-e["open"], e["category"]))
@@ -0,0 +1,15 @@
+import argparse
+from app import app
+from attendance.importer import import_punches
+
+# Imports badge-reader / door-access exports: CSV with an `email` or `user_id`
+# column, an ISO `timestamp` column (IST) and an optional `device` column.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import biometric punch logs.")
+    parser.add_argument("path", help="CSV export from the badge readers")
+    args = parser.parse_args()
+
+    with app.app_context():
+        with open(args.path, newline="", encoding="utf-8-sig") as f:
+            stats = import_punches(f)
+        print(", ".join(f"{k}={v}" for k, v in stats.items()))
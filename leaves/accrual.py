@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db
+from db_utils import upsert
+from accounts.models import User, EmployeeProfile
+from leaves.models import LeaveBalance
+
+
+def months_served(joining, year, months):
+    """
+    Accrual months earned in `year` up to and including month `months` (0-12),
+    per employee. The joining month counts pro rata by the days left in it;
+    no joining date, or one before the year, means every month counts.
+    `joining` is a datetime64 Series, `months` an int array or scalar.
+    """
+    months = np.asarray(months, dtype=float)
+    joined_before = joining.isna() | (joining.dt.year < year)
+    joined_after = joining.dt.year > year
+    join_month = joining.dt.month.fillna(1).to_numpy()
+    days_in_month = joining.dt.days_in_month.fillna(1).to_numpy()
+    join_fraction = (days_in_month - joining.dt.day.fillna(1).to_numpy() + 1) / days_in_month
+
+    in_year = np.where(months < join_month, 0.0, join_fraction + (months - join_month))
+    return np.where(joined_before, months, np.where(joined_after, 0.0, in_year))
+
+
+def accrual_frame(year, month):
+    """
+    Ledger entitlements for every active employee and configured leave type
+    after crediting `year` up to `month`, in one vectorized pass. Columns:
+    user_id, email, leave_type, joining_date, quota, entitled (current, NaN
+    without a ledger row), accrued_through, new_entitled, credit, changed.
+
+    Rows already accrued through `month` are left alone. A row the accrual
+    has never touched (created under the yearly grant, or by a leave
+    application) is set to the accrued total; otherwise the months since its
+    accrued_through are added, which keeps manual adjustments to `entitled`.
+    """
+    quotas = current_app.config.get("LEAVE_QUOTAS", {})
+    employees = pd.DataFrame(db.session.execute(
+        select(User.id.label("user_id"), User.email, EmployeeProfile.joining_date)
+        .outerjoin(EmployeeProfile, EmployeeProfile.user_id == User.id)
+        .where(User.role == "employee", User.is_active.is_(True))
+    ).all(), columns=["user_id", "email", "joining_date"])
+    balances = pd.DataFrame(db.session.execute(
+        select(LeaveBalance.user_id, LeaveBalance.leave_type, LeaveBalance.entitled, LeaveBalance.accrued_through)
+        .where(LeaveBalance.year == year)
+    ).all(), columns=["user_id", "leave_type", "entitled", "accrued_through"])
+
+    types = pd.DataFrame({"leave_type": list(quotas), "quota": [float(q) for q in quotas.values()]})
+    df = employees.merge(types, how="cross").merge(balances, on=["user_id", "leave_type"], how="left")
+    df["joining_date"] = pd.to_datetime(df["joining_date"])
+    df["entitled"] = df["entitled"].astype(float)
+    df["accrued_through"] = df["accrued_through"].astype(float)
+
+    monthly = df["quota"].to_numpy() / 12
+    target = np.round(monthly * months_served(df["joining_date"], year, month), 2)
+    already = np.round(monthly * months_served(df["joining_date"], year, df["accrued_through"].fillna(0).to_numpy()), 2)
+
+    untouched = df["accrued_through"].isna().to_numpy()
+    done = (df["accrued_through"] >= month).to_numpy()
+    current = df["entitled"].fillna(0).to_numpy()
+    df["new_entitled"] = np.where(done, current, np.where(untouched, target, np.round(current + target - already, 2)))
+    df["credit"] = np.round(df["new_entitled"] - current, 2)
+    df["changed"] = ~done
+    return df
+
+
+def run_accrual(year, month, dry_run=False):
+    """
+    Credits the month and writes every changed row with one bulk upsert of
+    (entitled, accrued_through). Returns the accrual frame; with dry_run the
+    database is left untouched.
+    """
+    df = accrual_frame(year, month)
+    changes = df[df["changed"]]
+    if dry_run or changes.empty:
+        return df
+
+    rows = [
+        {"user_id": int(user_id), "year": year, "leave_type": leave_type,
+         "entitled": float(entitled), "accrued_through": month}
+        for user_id, leave_type, entitled in zip(changes["user_id"], changes["leave_type"], changes["new_entitled"])
+    ]
+    db.session.execute(
+        upsert(LeaveBalance.__table__, ["user_id", "year", "leave_type"], ["entitled", "accrued_through"]),
+        rows,
+    )
+    db.session.commit()
+    return df
@@ -0,0 +1,68 @@
+import numpy as np
+from sqlalchemy import select
+
+from extensions import db
+from accounts.models import User
+from leaves.models import LeaveRequest
+from leaves.workdays import working_days
+
+# Requests that hold their dates; rejected ones free them up again
+BLOCKING_STATUSES = ("Pending", "Approved")
+
+
+def overlaps(start, end):
+    """Closed-interval overlap with start..end, written end-first to match the (…, end_date, start_date) indexes."""
+    return (LeaveRequest.end_date >= start) & (LeaveRequest.start_date <= end)
+
+
+def find_overlap(user_id, start, end, statuses=BLOCKING_STATUSES, exclude_id=None):
+    """
+    The user's first request in `statuses` sharing a day with start..end,
+    or None. One range probe on ix_leaves_user_end_start.
+    """
+    query = select(LeaveRequest).where(
+        LeaveRequest.user_id == user_id,
+        overlaps(start, end),
+        LeaveRequest.status.in_(statuses),
+    )
+    if exclude_id is not None:
+        query = query.where(LeaveRequest.id != exclude_id)
+    return db.session.execute(query.order_by(LeaveRequest.start_date).limit(1)).scalar()
+
+
+def who_is_out(start, end, include_pending=False):
+    """
+    Everyone on leave for at least one day of start..end, company-wide, in a
+    single scan of ix_leaves_end_start: end_date >= start bounds the range to
+    leaves that have not finished before the window, so history never gets read.
+    Each row also carries the working days that fall inside the window.
+    """
+    statuses = BLOCKING_STATUSES if include_pending else ("Approved",)
+    rows = db.session.execute(
+        select(
+            LeaveRequest.id, LeaveRequest.user_id, User.email, LeaveRequest.leave_type,
+            LeaveRequest.start_date, LeaveRequest.end_date, LeaveRequest.status,
+        )
+        .join(User, User.id == LeaveRequest.user_id)
+        .where(overlaps(start, end), LeaveRequest.status.in_(statuses))
+        .order_by(User.email, LeaveRequest.start_date)
+    ).all()
+
+    if not rows:
+        return []
+    starts = np.maximum(np.array([row.start_date for row in rows], dtype="datetime64[D]"), np.datetime64(start, "D"))
+    ends = np.minimum(np.array([row.end_date for row in rows], dtype="datetime64[D]"), np.datetime64(end, "D"))
+    in_window = working_days(starts, ends).tolist()
+    return [
+        {
+            "leave_id": row.id,
+            "user_id": row.user_id,
+            "email": row.email,
+            "leave_type": row.leave_type,
+            "start_date": row.start_date.isoformat(),
+            "end_date": row.end_date.isoformat(),
+            "status": row.status,
+            "working_days_in_range": days,
+        }
+        for row, days in zip(rows, in_window)
+    ]
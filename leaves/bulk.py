@@ -0,0 +1,85 @@
+from collections import defaultdict
+
+from sqlalchemy import select, update
+
+from extensions import db
+from accounts.models import User, DashboardCounters
+from leaves.models import LeaveRequest
+from leaves.ledger import post_leaves
+from payslips.models import Notification
+
+DECISIONS = {"approve": "Approved", "reject": "Rejected"}
+
+
+def _clashes(candidates):
+    """
+    Ids among `candidates` that would overlap an approved leave of the same
+    employee, counting earlier candidates in the batch as approved. One query
+    for the existing approved leaves of every user in the batch.
+    """
+    user_ids = {c.user_id for c in candidates}
+    lo, hi = min(c.start_date for c in candidates), max(c.end_date for c in candidates)
+    taken = defaultdict(list)
+    for row in db.session.execute(
+        select(LeaveRequest.user_id, LeaveRequest.start_date, LeaveRequest.end_date).where(
+            LeaveRequest.user_id.in_(user_ids), LeaveRequest.status == "Approved",
+            LeaveRequest.end_date >= lo, LeaveRequest.start_date <= hi,
+        )
+    ):
+        taken[row.user_id].append((row.start_date, row.end_date))
+
+    clashing = set()
+    for c in sorted(candidates, key=lambda c: (c.start_date, c.id)):
+        spans = taken[c.user_id]
+        if any(start <= c.end_date and c.start_date <= end for start, end in spans):
+            clashing.add(c.id)
+        else:
+            spans.append((c.start_date, c.end_date))
+    return clashing
+
+
+def decide_leaves(ids, action):
+    """
+    Approves or rejects many pending requests in one transaction: a single
+    UPDATE for the status, one batched ledger posting and one batch of
+    employee notifications. Requests that are no longer pending are skipped;
+    approvals that would overlap an approved leave are left pending.
+    Returns {"updated", "skipped", "conflicts"}.
+    """
+    new_status = DECISIONS[action]
+    ids = sorted(set(ids))
+    candidates = db.session.execute(
+        select(LeaveRequest.id, LeaveRequest.user_id, LeaveRequest.leave_type,
+               LeaveRequest.start_date, LeaveRequest.end_date, User.email)
+        .join(User, User.id == LeaveRequest.user_id)
+        .where(LeaveRequest.id.in_(ids), LeaveRequest.status == "Pending")
+        .with_for_update(of=LeaveRequest)
+    ).all() if ids else []
+
+    conflicts = _clashes(candidates) if candidates and new_status == "Approved" else set()
+    chosen = [c for c in candidates if c.id not in conflicts]
+    if chosen:
+        # Re-checking status keeps a concurrent single action from being applied twice
+        db.session.execute(
+            update(LeaveRequest)
+            .where(LeaveRequest.id.in_([c.id for c in chosen]), LeaveRequest.status == "Pending")
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        post_leaves(chosen, "Pending", new_status)
+
+        db.session.execute(Notification.__table__.insert(), [
+            {"user_id": c.user_id, "user": c.email, "message": f"Your {c.leave_type} leave from {c.start_date.strftime('%d %b')} "
+                                         f"to {c.end_date.strftime('%d %b, %Y')} was {new_status.lower()}.",
+             "is_read": False}
+            for c in chosen
+        ])
+        unread = defaultdict(int)
+        for c in chosen:
+            unread[c.user_id] += 1
+        DashboardCounters.bump_many(["user_id"], [
+            {"user_id": user_id, "unread_notifications": n} for user_id, n in unread.items()
+        ])
+    db.session.commit()
+
+    return {"updated": len(chosen), "skipped": len(ids) - len(candidates), "conflicts": len(conflicts)}
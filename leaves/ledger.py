@@ -0,0 +1,140 @@
+from collections import defaultdict
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import func, literal, select, text, update
+
+from extensions import db
+from leaves.models import LeaveBalance, LeaveRequest, opening_entitlement
+from leaves.workdays import split_by_year
+
+# Ledger column that holds the days of a request in each status; other statuses hold none
+STATUS_COLUMNS = {"Pending": "pending", "Approved": "used"}
+
+
+def leave_days_by_year(start, end):
+    """Working days of start..end as {year: days}, so a leave across New Year charges both years."""
+    _, years, days = split_by_year([start], [end])
+    return {int(year): int(n) for year, n in zip(years, days) if n}
+
+
+def post_leave(leave, old_status, new_status):
+    """
+    Moves a request's days between ledger columns for a status change.
+    old_status is None for a new application, new_status None for a
+    withdrawal. Runs in the caller's transaction; the caller commits.
+    """
+    old_col, new_col = STATUS_COLUMNS.get(old_status), STATUS_COLUMNS.get(new_status)
+    if old_col == new_col:
+        return
+    for year, days in leave_days_by_year(leave.start_date, leave.end_date).items():
+        deltas = {}
+        if old_col:
+            deltas[old_col] = -days
+        if new_col:
+            deltas[new_col] = deltas.get(new_col, 0) + days
+        LeaveBalance.bump(leave.user_id, year, leave.leave_type, **deltas)
+
+
+def post_leaves(leaves, old_status, new_status):
+    """
+    Batch form of post_leave for many requests making the same status
+    change (HR bulk actions): working days are split per year in one
+    vectorized call and the ledger moves in two executemany round trips.
+    `leaves` need user_id, leave_type, start_date and end_date.
+    """
+    old_col, new_col = STATUS_COLUMNS.get(old_status), STATUS_COLUMNS.get(new_status)
+    if old_col == new_col or not leaves:
+        return
+    deltas = defaultdict(float)
+    rows, years, days = split_by_year([l.start_date for l in leaves], [l.end_date for l in leaves])
+    for row, year, n in zip(rows.tolist(), years.tolist(), days.tolist()):
+        leave = leaves[row]
+        deltas[(leave.user_id, year, leave.leave_type)] += n
+
+    LeaveBalance.bump_many(["user_id", "year", "leave_type"], [
+        {
+            "user_id": user_id, "year": year, "leave_type": leave_type,
+            **({old_col: -n} if old_col else {}), **({new_col: n} if new_col else {}),
+        }
+        for (user_id, year, leave_type), n in deltas.items() if n
+    ])
+
+
+def balances_for(user_id, year):
+    """The user's ledger rows for `year`, one per leave type, plus zero-use rows for unused quota types."""
+    rows = {row.leave_type: row for row in LeaveBalance.query.filter_by(user_id=user_id, year=year)}
+    for leave_type in current_app.config.get("LEAVE_QUOTAS", {}):
+        if leave_type not in rows:
+            rows[leave_type] = LeaveBalance(
+                user_id=user_id, year=year, leave_type=leave_type,
+                entitled=opening_entitlement(leave_type), used=0.0, pending=0.0
+            )
+    return sorted(rows.values(), key=lambda row: row.leave_type)
+
+
+def available_days(user_id, year):
+    """
+    SQL for the user's total remaining days in `year` across the configured
+    leave types, for embedding in other queries. A type without a ledger row
+    yet counts at its opening entitlement. One primary-key lookup per type.
+    """
+    terms = [
+        func.coalesce(
+            select(LeaveBalance.entitled - LeaveBalance.used)
+            .where(LeaveBalance.user_id == user_id, LeaveBalance.year == year, LeaveBalance.leave_type == leave_type)
+            .scalar_subquery(),
+            opening_entitlement(leave_type),
+        )
+        for leave_type in current_app.config.get("LEAVE_QUOTAS", {})
+    ]
+    return sum(terms[1:], terms[0]) if terms else literal(0.0)
+
+
+def reconcile_ledger(years=None):
+    """
+    Rebuilds used/pending from the leaves history for `years` (default: every
+    year with a request or a ledger row), reading only the requests that
+    overlap them. Entitlements on existing rows are kept; missing rows are
+    created at the opening entitlement. Concurrent ledger writes wait until
+    the rebuild commits, so none is lost between the read and the re-add.
+    Returns the number of (user, year, type) rows with activity.
+    """
+    if db.engine.dialect.name == "postgresql":
+        # Blocks other writers (post_leave's upserts included) but not readers, until commit
+        db.session.execute(text("LOCK TABLE leave_balances IN SHARE ROW EXCLUSIVE MODE"))
+
+    active = LeaveRequest.status.in_(STATUS_COLUMNS)
+    if years is None:
+        first, last = db.session.execute(
+            select(func.min(LeaveRequest.start_date), func.max(LeaveRequest.end_date)).where(active)
+        ).one()
+        years = set(db.session.execute(select(LeaveBalance.year).distinct()).scalars())
+        if first:
+            years.update(range(first.year, last.year + 1))
+    years = set(years)
+    if not years:
+        return 0
+
+    # Zeroing first also takes SQLite's write lock before the history is read
+    db.session.execute(update(LeaveBalance).where(LeaveBalance.year.in_(years)).values(used=0.0, pending=0.0))
+    leaves = db.session.execute(
+        select(LeaveRequest.user_id, LeaveRequest.leave_type, LeaveRequest.start_date,
+               LeaveRequest.end_date, LeaveRequest.status)
+        .where(active, LeaveRequest.start_date <= date(max(years), 12, 31), LeaveRequest.end_date >= date(min(years), 1, 1))
+    ).all()
+
+    # Those requests' working days per year in one vectorized pass
+    totals = defaultdict(lambda: {"used": 0.0, "pending": 0.0})
+    rows, piece_years, piece_days = split_by_year([l.start_date for l in leaves], [l.end_date for l in leaves])
+    for row, year, days in zip(rows.tolist(), piece_years.tolist(), piece_days.tolist()):
+        leave = leaves[row]
+        if year in years:
+            totals[(leave.user_id, year, leave.leave_type)][STATUS_COLUMNS[leave.status]] += days
+
+    LeaveBalance.bump_many(["user_id", "year", "leave_type"], [
+        {"user_id": user_id, "year": year, "leave_type": leave_type, **values}
+        for (user_id, year, leave_type), values in totals.items()
+    ])
+    db.session.commit()
+    return len(totals)
@@ -1,5 +1,7 @@
 from extensions import db
+from db_utils import RollupMixin
 from datetime import datetime
+from flask import current_app
 
 class LeaveRequest(db.Model):
     __tablename__ = 'leaves'
@@ -13,4 +15,58 @@ class LeaveRequest(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Helper to get the user's email easily in templates
-    user = db.relationship('User', backref='user_leaves')
\ No newline at end of file
+    user = db.relationship('User', backref='user_leaves')
+
+    # Interval lookups (see leaves/availability.py): leaves that end on/after a day, per user and company-wide
+    __table_args__ = (
+        db.Index('ix_leaves_user_end_start', 'user_id', 'end_date', 'start_date'),
+        db.Index('ix_leaves_end_start', 'end_date', 'start_date'),
+        db.Index('ix_leaves_status_id', 'status', 'id'),  # HR listing filtered by status
+    )
+
+
+def opening_entitlement(leave_type):
+    """What a ledger row starts with: the yearly quota, or nothing until accrual credits it."""
+    if current_app.config.get("LEAVE_ACCRUAL") == "monthly":
+        return 0.0
+    return float(current_app.config.get("LEAVE_QUOTAS", {}).get(leave_type, 0))
+
+
+def default_entitlement(context):
+    """New ledger rows start from the opening entitlement for their leave type."""
+    return opening_entitlement(context.get_current_parameters()["leave_type"])
+
+
+class LeaveBalance(RollupMixin, db.Model):
+    """
+    Leave ledger: one row per user, year and leave type. `used` and `pending`
+    move with every application, approval, rejection and withdrawal (see
+    leaves/ledger.py), so a balance read is a primary-key lookup.
+    """
+    __tablename__ = 'leave_balances'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    leave_type = db.Column(db.String(50), primary_key=True)
+    entitled = db.Column(db.Float, nullable=False, default=default_entitlement)
+    used = db.Column(db.Float, nullable=False, default=0.0)     # Approved days
+    pending = db.Column(db.Float, nullable=False, default=0.0)  # Days awaiting HR
+    # Last month (1-12) credited by the monthly accrual run; NULL until the first run touches the row
+    accrued_through = db.Column(db.Integer)
+
+    @property
+    def available(self):
+        return self.entitled - self.used
+
+    @classmethod
+    def bump(cls, user_id, year, leave_type, **deltas):
+        cls._bump({"user_id": user_id, "year": year, "leave_type": leave_type}, deltas)
+
+
+class Holiday(db.Model):
+    """Company holidays; never charged as leave (see leaves/workdays.py)."""
+    __tablename__ = 'holidays'
+
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, nullable=False, unique=True)
+    name = db.Column(db.String(100), nullable=False)
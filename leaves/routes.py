@@ -1,11 +1,24 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
 from extensions import db
-from leaves.models import LeaveRequest  # Matches your NOTE
+from sqlalchemy.orm import joinedload
+from leaves.models import LeaveRequest, Holiday  # Matches your NOTE
+from leaves.ledger import post_leave, balances_for, reconcile_ledger
+from leaves.workdays import chargeable_days, working_days
+from leaves.availability import find_overlap, who_is_out
+from leaves.bulk import decide_leaves, DECISIONS
 from accounts.decorators import login_required, role_required
 from datetime import datetime
 
 leaves_bp = Blueprint("leaves", __name__, url_prefix="/leaves")
 
+PER_PAGE = 50
+STATUSES = ("Pending", "Approved", "Rejected")
+
+def days_by_id(leaves):
+    """Working days for a whole listing in one vectorized call, keyed by request id."""
+    counts = working_days([l.start_date for l in leaves], [l.end_date for l in leaves])
+    return dict(zip((l.id for l in leaves), counts.tolist()))
+
 # ================= MAIN LEAVES PAGE =================
 @leaves_bp.route("/")
 @login_required
@@ -44,6 +57,18 @@ def apply_leave():
                 flash("Error: End date cannot be before the start date. ❌", "danger")
                 return render_template("leaves/apply_leave.html")
 
+            # Weekends and company holidays are not charged
+            days = chargeable_days(from_dt, to_dt)
+            if days == 0:
+                flash("Error: The selected dates are all weekends or holidays. ❌", "danger")
+                return render_template("leaves/apply_leave.html")
+
+            clash = find_overlap(session["user_id"], from_dt, to_dt)
+            if clash:
+                flash(f"Error: You already have a {clash.status.lower()} {clash.leave_type} leave from "
+                      f"{clash.start_date.strftime('%d %b')} to {clash.end_date.strftime('%d %b, %Y')}. ❌", "danger")
+                return render_template("leaves/apply_leave.html")
+
             # 4. Create the database record
             new_leave = LeaveRequest(
                 user_id=session["user_id"],
@@ -55,9 +80,10 @@ def apply_leave():
             )
 
             db.session.add(new_leave)
+            post_leave(new_leave, None, "Pending")
             db.session.commit()
             
-            flash("Leave application submitted successfully! 🚀", "success")
+            flash(f"Leave application for {days} working day(s) submitted successfully! 🚀", "success")
             return redirect(url_for("leaves.my_leaves"))
 
         except Exception as e:
@@ -73,18 +99,61 @@ def apply_leave():
 def my_leaves():
     # Employees only see their own history
     leaves = LeaveRequest.query.filter_by(user_id=session["user_id"]).order_by(LeaveRequest.id.desc()).all()
-    return render_template("leaves/my_leaves.html", leaves=leaves)
+    balances = balances_for(session["user_id"], datetime.now().year)
+    return render_template("leaves/my_leaves.html", leaves=leaves, balances=balances, leave_days=days_by_id(leaves))
 
 # ================= HR MANAGE LEAVES =================
 @leaves_bp.route("/manage-leaves")
 @login_required
 @role_required("hr")
 def manage_leaves():
-    # HR views all requests across the company
-    all_leaves = LeaveRequest.query.order_by(LeaveRequest.id.desc()).all()
-    
-    return render_template("leaves/manage_leaves.html", requests=all_leaves)
-    
+    # HR views requests across the company, newest first, one keyset page at a time
+    status = request.args.get("status")
+    status = status if status in STATUSES else None
+    query = LeaveRequest.query.options(joinedload(LeaveRequest.user))
+    if status:
+        query = query.filter(LeaveRequest.status == status)
+    cursor = request.args.get("cursor", type=int)
+    if cursor:
+        query = query.filter(LeaveRequest.id < cursor)
+    page = query.order_by(LeaveRequest.id.desc()).limit(PER_PAGE + 1).all()
+    next_cursor = page[PER_PAGE - 1].id if len(page) > PER_PAGE else None
+    page = page[:PER_PAGE]
+
+    return render_template("leaves/manage_leaves.html", requests=page, leave_days=days_by_id(page),
+                           status=status, statuses=STATUSES, next_cursor=next_cursor)
+
+@leaves_bp.route("/bulk-action", methods=["POST"])
+@login_required
+@role_required("hr")
+def bulk_action():
+    """Approve/reject many pending requests at once; form or JSON body with `ids` and `action`."""
+    payload = request.get_json(silent=True) if request.is_json else None
+    if payload is not None:
+        action, raw_ids = payload.get("action"), payload.get("ids") or []
+    else:
+        action, raw_ids = request.form.get("action"), request.form.getlist("ids")
+    try:
+        ids = [int(i) for i in raw_ids]
+    except (TypeError, ValueError):
+        ids = None
+
+    if action not in DECISIONS or ids is None:
+        if payload is not None:
+            return jsonify({"status": "error", "message": "action must be approve/reject and ids a list of integers"}), 400
+        flash("Select at least one request and an action.", "danger")
+        return redirect(url_for("leaves.manage_leaves", status=request.args.get("status")))
+
+    counts = decide_leaves(ids, action)
+    if payload is not None:
+        return jsonify({"status": "success", **counts})
+
+    flash(f"{counts['updated']} request(s) {DECISIONS[action].lower()} ✅", "success")
+    if counts["conflicts"]:
+        flash(f"{counts['conflicts']} left pending: they overlap an approved leave.", "danger")
+    if counts["skipped"]:
+        flash(f"{counts['skipped']} skipped: no longer pending.", "info")
+    return redirect(url_for("leaves.manage_leaves", status=request.args.get("status")))
 
 
 # ================= HR LEAVE ACTION =================
@@ -93,14 +162,23 @@ def manage_leaves():
 @role_required("hr")
 def leave_action(id, action):
     leave = LeaveRequest.query.get_or_404(id)
+    old_status = leave.status
 
     if action.lower() == "approve" or action.lower() == "approved":
+        # Requests filed before the overlap check existed can still collide
+        clash = find_overlap(leave.user_id, leave.start_date, leave.end_date, ("Approved",), exclude_id=leave.id)
+        if clash:
+            flash(f"Request #{id} overlaps approved request #{clash.id}; reject one of them instead. ❌", "danger")
+            return redirect(url_for("leaves.manage_leaves"))
         leave.status = "Approved"
         flash(f"Leave approved for request #{id} ✅", "success")
     else:
         leave.status = "Rejected"
         flash(f"Leave rejected for request #{id} ❌", "danger")
 
+    # Ledger moves in the same transaction as the status change
+    post_leave(leave, old_status, leave.status)
+
     db.session.commit()
     return redirect(url_for("leaves.manage_leaves"))
 
@@ -112,10 +190,76 @@ def withdraw_leave(id):
     leave = LeaveRequest.query.filter_by(id=id, user_id=session["user_id"]).first_or_404()
     
     if leave.status == "Pending":
+        post_leave(leave, "Pending", None)
         db.session.delete(leave)
         db.session.commit()
         flash("Leave request withdrawn successfully.", "success")
     else:
         flash("You cannot withdraw a request that has already been processed.", "danger")
         
-    return redirect(url_for("leaves.my_leaves"))
\ No newline at end of file
+    return redirect(url_for("leaves.my_leaves"))
+
+# ================= HR AVAILABILITY API =================
+@leaves_bp.route("/api/out")
+@login_required
+@role_required("hr")
+def out_between():
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD[&pending=1] -> everyone on leave for any day in the range."""
+    try:
+        start = datetime.strptime(request.args.get("start", ""), "%Y-%m-%d").date()
+        end = datetime.strptime(request.args.get("end") or request.args["start"], "%Y-%m-%d").date()
+    except (KeyError, ValueError):
+        return jsonify({"status": "error", "message": "start (and optional end) must be YYYY-MM-DD"}), 400
+    if end < start:
+        return jsonify({"status": "error", "message": "end is before start"}), 400
+
+    people = who_is_out(start, end, include_pending=request.args.get("pending") == "1")
+    return jsonify({
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "count": len({p["user_id"] for p in people}),
+        "leaves": people,
+    })
+
+# ================= HR HOLIDAY CALENDAR =================
+@leaves_bp.route("/holidays", methods=["GET", "POST"])
+@login_required
+@role_required("hr")
+def holidays():
+    if request.method == "POST":
+        try:
+            day = datetime.strptime(request.form.get("date"), "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            flash("Please pick a valid date.", "danger")
+            return redirect(url_for("leaves.holidays"))
+        name = (request.form.get("name") or "").strip() or "Holiday"
+
+        if Holiday.query.filter_by(date=day).first():
+            flash(f"{day.strftime('%d %b, %Y')} is already a holiday.", "danger")
+            return redirect(url_for("leaves.holidays"))
+
+        db.session.add(Holiday(date=day, name=name))
+        db.session.commit()
+        refresh_calendar(day.year)
+        flash(f"Added {name} on {day.strftime('%d %b, %Y')} ✅", "success")
+        return redirect(url_for("leaves.holidays"))
+
+    all_holidays = Holiday.query.order_by(Holiday.date.desc()).all()
+    return render_template("leaves/holidays.html", holidays=all_holidays)
+
+@leaves_bp.route("/holidays/delete/<int:id>", methods=["POST"])
+@login_required
+@role_required("hr")
+def delete_holiday(id):
+    holiday = Holiday.query.get_or_404(id)
+    year = holiday.date.year
+    db.session.delete(holiday)
+    db.session.commit()
+    refresh_calendar(year)
+    flash("Holiday removed.", "success")
+    return redirect(url_for("leaves.holidays"))
+
+def refresh_calendar(year):
+    # Balances already charged for that year are re-counted against the new calendar;
+    # every worker's cached calendar notices the edit on its next read (see get_busday_calendar)
+    reconcile_ledger([year])
@@ -0,0 +1,65 @@
+import threading
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db
+from leaves.models import Holiday
+
+_calendar = None
+_calendar_version = None
+_calendar_lock = threading.Lock()
+
+
+def get_busday_calendar():
+    """
+    numpy business-day calendar for WORK_WEEK plus the holidays table, cached
+    per process. The holiday dates themselves are the cache version: they are
+    re-read (one small indexed query) on every call, and the calendar is only
+    rebuilt when they differ, so every worker sees HR's edits at once.
+    """
+    global _calendar, _calendar_version
+    version = (current_app.config.get("WORK_WEEK", "1111100"),
+               tuple(db.session.execute(select(Holiday.date).order_by(Holiday.date)).scalars()))
+    if version != _calendar_version:
+        with _calendar_lock:
+            if version != _calendar_version:
+                weekmask, holidays = version
+                _calendar = np.busdaycalendar(weekmask=weekmask, holidays=np.array(holidays, dtype="datetime64[D]"))
+                _calendar_version = version
+    return _calendar
+
+
+def working_days(starts, ends):
+    """
+    Chargeable days for each inclusive range starts[i]..ends[i] in one
+    vectorized busday_count call. Accepts sequences of dates (or
+    datetime64[D] arrays); returns an int array.
+    """
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    ends = np.asarray(ends, dtype="datetime64[D]") + np.timedelta64(1, "D")
+    return np.maximum(np.busday_count(starts, ends, busdaycal=get_busday_calendar()), 0)
+
+
+def chargeable_days(start, end):
+    return int(working_days([start], [end])[0])
+
+
+def split_by_year(starts, ends):
+    """
+    Cuts every inclusive range at year boundaries and counts working days
+    per piece. Returns (row, year, days) arrays: piece k belongs to input row
+    row[k] and falls in calendar year year[k].
+    """
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    ends = np.asarray(ends, dtype="datetime64[D]")
+    first, last = starts.astype("datetime64[Y]"), ends.astype("datetime64[Y]")
+    spans = np.maximum((last - first).astype(int) + 1, 1)
+
+    row = np.repeat(np.arange(len(starts)), spans)
+    offset = np.arange(len(row)) - np.repeat(np.cumsum(spans) - spans, spans)
+    year = first[row] + offset
+    piece_start = np.maximum(starts[row], year.astype("datetime64[D]"))
+    piece_end = np.minimum(ends[row], (year + 1).astype("datetime64[D]") - np.timedelta64(1, "D"))
+    return row, year.astype(int) + 1970, working_days(piece_start, piece_end)
@@ -1,6 +1,15 @@
 from app import app, db
+from grievances.search import ensure_search_index
 from sqlalchemy import text
 
+def column_type(table, column):
+    return db.session.execute(text(
+        "SELECT data_type FROM information_schema.columns WHERE table_name = :table AND column_name = :column"
+    ), {"table": table, "column": column}).scalar()
+
+def index_exists(name):
+    return db.session.execute(text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {"name": name}).first() is not None
+
 def apply_migrations():
     with app.app_context():
         try:
@@ -9,24 +18,114 @@ def apply_migrations():
             # 1. Ensure location columns exist
             db.session.execute(text("ALTER TABLE attendance ADD COLUMN IF NOT EXISTS location VARCHAR(255)"))
             db.session.execute(text("ALTER TABLE attendance ADD COLUMN IF NOT EXISTS location_out VARCHAR(255)"))
+            db.session.execute(text("ALTER TABLE attendance ADD COLUMN IF NOT EXISTS auto_closed BOOLEAN DEFAULT FALSE"))
+            db.session.execute(text("ALTER TABLE attendance ADD COLUMN IF NOT EXISTS needs_review BOOLEAN DEFAULT FALSE"))
             
             # 2. Upgrade clock columns to TIMESTAMP WITH TIME ZONE
-            # We use concatenation (||) to merge CURRENT_DATE and the time value safely
+            # Only columns still holding a bare time get today's date; the script is re-run after
+            # every release, so converted columns must be left alone or every punch moves to today
             print("Upgrading clock columns to support seconds and dates...")
-            db.session.execute(text("""
-                ALTER TABLE attendance 
-                ALTER COLUMN clock_in TYPE TIMESTAMP WITH TIME ZONE 
-                USING (CURRENT_DATE + clock_in::time),
-                ALTER COLUMN clock_out TYPE TIMESTAMP WITH TIME ZONE 
-                USING (CURRENT_DATE + clock_out::time);
-            """))
+            for column in ("clock_in", "clock_out"):
+                current = column_type("attendance", column)
+                if current == "time without time zone":
+                    using = f"(CURRENT_DATE + {column})"
+                elif current == "timestamp without time zone":
+                    using = f"{column}"
+                else:
+                    continue
+                db.session.execute(text(
+                    f"ALTER TABLE attendance ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE USING {using}"
+                ))
             
             # 3. Fix Leaves table
             print("Checking Leaves table columns...")
             db.session.execute(text("ALTER TABLE leaves ADD COLUMN IF NOT EXISTS start_date DATE"))
             db.session.execute(text("ALTER TABLE leaves ADD COLUMN IF NOT EXISTS end_date DATE"))
             
+            # 4. One shift per user per day + partial index over open shifts
+            print("Indexing attendance shifts...")
+            if not index_exists("_user_date_uc"):
+                # Keep the most complete row per (user_id, date): closed shifts first, then the most
+                # hours. The others are copied to attendance_duplicates before they are deleted
+                db.session.execute(text(
+                    "CREATE TABLE IF NOT EXISTS attendance_duplicates AS SELECT *, NOW() AS removed_at FROM attendance WHERE FALSE"
+                ))
+                moved = db.session.execute(text("""
+                    WITH ranked AS (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY user_id, date
+                            ORDER BY clock_out IS NOT NULL DESC, total_hours DESC NULLS LAST, id
+                        ) AS rank
+                        FROM attendance
+                    ), removed AS (
+                        DELETE FROM attendance a USING ranked r
+                        WHERE a.id = r.id AND r.rank > 1
+                        RETURNING a.*
+                    )
+                    INSERT INTO attendance_duplicates SELECT *, NOW() FROM removed
+                """)).rowcount
+                print(f"Moved {moved} duplicate shift(s) to attendance_duplicates.")
+            db.session.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS _user_date_uc ON attendance (user_id, date)"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_attendance_open_shift ON attendance (user_id) WHERE clock_out IS NULL"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_attendance_date_id ON attendance (date, id)"))
+
+            # 5. Numeric punch coordinates + geofence site, backfilled from rows still holding raw coordinates
+            print("Adding numeric coordinates and geofence sites...")
+            for table in ("attendance", "attendance_archive"):
+                for column in ("lat_in", "lon_in", "lat_out", "lon_out"):
+                    db.session.execute(text(f"ALTER TABLE IF EXISTS {table} ADD COLUMN IF NOT EXISTS {column} DOUBLE PRECISION"))
+                db.session.execute(text(f"ALTER TABLE IF EXISTS {table} ADD COLUMN IF NOT EXISTS site VARCHAR(100)"))
+            for prefix, column in (("in", "location"), ("out", "location_out")):
+                db.session.execute(text(f"""
+                    UPDATE attendance SET
+                        lat_{prefix} = split_part(replace(replace({column}, 'Lat:', ''), 'Lon:', ''), ',', 1)::double precision,
+                        lon_{prefix} = split_part(replace(replace({column}, 'Lat:', ''), 'Lon:', ''), ',', 2)::double precision
+                    WHERE {column} ~ '^Lat: *-?[0-9.]+, *Lon: *-?[0-9.]+$' AND lat_{prefix} IS NULL
+                """))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_attendance_site_date ON attendance (site, date)"))
+
+            # Change marker polled by the live board
+            db.session.execute(text("ALTER TABLE attendance ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT NOW()"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_attendance_updated_at ON attendance (updated_at)"))
+
+            # Monthly accrual watermark on the leave ledger
+            db.session.execute(text("ALTER TABLE IF EXISTS leave_balances ADD COLUMN IF NOT EXISTS accrued_through INTEGER"))
+
+            # Range indexes behind the leave overlap check and the who-is-out API
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_leaves_user_end_start ON leaves (user_id, end_date, start_date)"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_leaves_end_start ON leaves (end_date, start_date)"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_leaves_status_id ON leaves (status, id)"))
+
+            # Grievance inbox indexes; the keyset pager needs created_at on every row
+            db.session.execute(text("UPDATE grievances SET created_at = COALESCE(resolved_at, NOW()) WHERE created_at IS NULL"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_grievances_status_created ON grievances (status, created_at)"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_grievances_created_at ON grievances (created_at)"))
+
+            # Grievances and notifications owned by user_id; existing rows mapped from their email in one pass each
+            print("Linking grievances and notifications to users...")
+            db.session.execute(text("ALTER TABLE grievances ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users (id)"))
+            db.session.execute(text("ALTER TABLE notifications ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users (id)"))
+            db.session.execute(text("""
+                UPDATE grievances g SET user_id = u.id FROM users u
+                WHERE lower(g.created_by) = lower(u.email) AND g.user_id IS NULL
+            """))
+            db.session.execute(text("""
+                UPDATE notifications n SET user_id = u.id FROM users u
+                WHERE lower(n."user") = lower(u.email) AND n.user_id IS NULL
+            """))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_grievances_user_id ON grievances (user_id, id)"))
+            db.session.execute(text("CREATE INDEX IF NOT EXISTS ix_notifications_user_read ON notifications (user_id, is_read)"))
+
+            # Full-text search: weighted tsvector column + GIN index
+            print("Indexing grievances for full-text search...")
+            ensure_search_index(db.session.connection())
+            
             db.session.commit()
+
+            # 6. Create any new tables (e.g. geocode_cache); existing tables are left untouched
+            print("Creating missing tables...")
+            db.create_all()
+
             print("Database migration successful! ✅")
             
         except Exception as e:
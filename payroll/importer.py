@@ -0,0 +1,133 @@
+import io
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select
+
+from extensions import db
+from db_utils import upsert
+from accounts.models import User
+from payroll.models import PayrollImportErrorSheet, PayrollRecord
+
+CHUNK_SIZE = 20000
+AMOUNT_COLUMNS = ("basic_salary", "allowances", "deductions")
+# Error sheets older than this are pruned by the next import
+ERROR_SHEET_TTL = timedelta(days=1)
+
+
+def read_sheet(file, filename):
+    """
+    Yields DataFrames of raw text cells with normalised headers: CSVs in
+    CHUNK_SIZE-row chunks, Excel workbooks whole.
+    """
+    if filename.lower().endswith((".xlsx", ".xls")):
+        chunks = [pd.read_excel(file, dtype=str)]
+    else:
+        chunks = pd.read_csv(file, dtype=str, chunksize=CHUNK_SIZE)
+    first_row = 2  # Spreadsheet row of the first data line, under the header
+    for chunk in chunks:
+        chunk.columns = [str(c).lower().strip() for c in chunk.columns]
+        if "email" not in chunk.columns:
+            raise ValueError("The sheet needs an 'email' column")
+        chunk.index = pd.RangeIndex(first_row, first_row + len(chunk))
+        first_row += len(chunk)
+        yield chunk
+
+
+def validate(chunk, user_ids):
+    """
+    Vectorised checks and net pay for one chunk. Missing amount columns or
+    blank cells count as 0, as before; text that is not a number, negative
+    amounts and emails with no account are errors.
+    Returns (valid rows with user_id and amounts, error rows with a reason).
+    """
+    raw = chunk.reindex(columns=["email", *AMOUNT_COLUMNS]).fillna("").apply(lambda s: s.str.strip())
+    raw = raw.reset_index(names="row")
+    raw["email_key"] = raw["email"].str.lower()
+    # Left merge on unique keys keeps the sheet's row order and length
+    df = raw.merge(user_ids, how="left", on="email_key")
+
+    checks = {"no employee with this email": df["user_id"].isna()}
+    for col in AMOUNT_COLUMNS:
+        text = df[col].str.replace(",", "", regex=False)
+        blank = text == ""
+        values = pd.to_numeric(text, errors="coerce")
+        checks[f"{col} is not a number"] = values.isna() & ~blank
+        checks[f"{col} is negative"] = values < 0
+        df[col] = values.where(~blank, 0.0)
+
+    df["net_salary"] = df["basic_salary"] + df["allowances"] - df["deductions"]
+    failed = pd.DataFrame(checks)
+    bad = failed.any(axis=1)
+    # Reasons are spelled out only for the failing rows, which are few
+    reasons = ["; ".join(failed.columns[flags]) for flags in failed[bad].to_numpy()]
+    # The error sheet keeps the cells as typed, so HR can fix and re-upload it
+    errors = raw.loc[bad, ["row", "email", *AMOUNT_COLUMNS]].assign(error=reasons)
+    valid = df.loc[~bad, ["user_id", *AMOUNT_COLUMNS, "net_salary"]].astype({"user_id": np.int64})
+    return valid, errors
+
+
+def import_payroll_sheet(file, filename, month):
+    """
+    Imports a payroll sheet (email, basic_salary, allowances, deductions)
+    for `month`: one email -> user_id query, then per chunk vectorised
+    validation, net pay and one bulk upsert on _user_month_uc, all in one
+    transaction. A user listed twice gets the last row, as before.
+    Returns (stats, error_token); error_token names the saved error sheet
+    (see error_sheet) or is None when every row was valid.
+    """
+    user_ids = pd.DataFrame(
+        db.session.execute(select(func.lower(User.email), User.id)).all(), columns=["email_key", "user_id"]
+    ).drop_duplicates("email_key")
+    existing = set(db.session.execute(
+        select(PayrollRecord.user_id).where(PayrollRecord.month == month)
+    ).scalars())
+    stmt = upsert(PayrollRecord.__table__, ["user_id", "month"], [*AMOUNT_COLUMNS, "net_salary", "status"])
+    columns = ["user_id", *AMOUNT_COLUMNS, "net_salary"]
+
+    stats = {"rows": 0, "imported": 0, "added": 0, "updated": 0, "duplicates": 0, "errors": 0}
+    written = set()  # Grows with employees, not with rows
+    errors = io.StringIO()
+    for chunk in read_sheet(file, filename):
+        stats["rows"] += len(chunk)
+        valid, bad = validate(chunk, user_ids)
+        bad.to_csv(errors, index=False, header=errors.tell() == 0)
+        stats["errors"] += len(bad)
+
+        # One statement cannot upsert a row twice; later chunks simply overwrite earlier ones
+        deduped = valid.drop_duplicates("user_id", keep="last")
+        seen_before = deduped["user_id"].isin(written)
+        fresh = deduped.loc[~seen_before, "user_id"]
+        stats["duplicates"] += len(valid) - len(deduped) + int(seen_before.sum())
+        stats["updated"] += int(fresh.isin(existing).sum())
+        stats["added"] += int((~fresh.isin(existing)).sum())
+        written.update(fresh.tolist())
+        if len(deduped):
+            # tolist() hands the driver plain Python numbers, and is far quicker than to_dict("records")
+            db.session.execute(stmt, [
+                dict(zip(columns, values), month=month, status="Processed")
+                for values in zip(*(deduped[c].tolist() for c in columns))
+            ])
+    stats["imported"] = len(written)
+
+    token = None
+    db.session.execute(delete(PayrollImportErrorSheet).where(
+        PayrollImportErrorSheet.created_at < datetime.utcnow() - ERROR_SHEET_TTL
+    ))
+    if stats["errors"]:
+        token = uuid.uuid4().hex
+        db.session.add(PayrollImportErrorSheet(token=token, content=errors.getvalue(), rows=stats["errors"]))
+    db.session.commit()
+    return stats, token
+
+
+def error_sheet(token):
+    """The saved error sheet for an import token, or None once it has expired or for anything we did not issue."""
+    if not isinstance(token, str):
+        return None
+    sheet = db.session.get(PayrollImportErrorSheet, token)
+    if sheet is None or sheet.created_at < datetime.utcnow() - ERROR_SHEET_TTL:
+        return None
+    return sheet
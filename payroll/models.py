@@ -25,4 +25,16 @@ class PayrollRecord(db.Model):
     )
 
     def __repr__(self):
-        return f"<PayrollRecord {self.user_id} - {self.month}>"
\ No newline at end of file
+        return f"<PayrollRecord {self.user_id} - {self.month}>"
+
+class PayrollImportErrorSheet(db.Model):
+    """Rows a payroll import skipped, as CSV, kept in the database so any worker can serve the download."""
+    __tablename__ = 'payroll_import_error_sheets'
+
+    token = db.Column(db.String(32), primary_key=True)
+    content = db.Column(db.Text, nullable=False)
+    rows = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<PayrollImportErrorSheet {self.token} ({self.rows} rows)>"
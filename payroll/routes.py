@@ -1,13 +1,14 @@
 import csv
 import io
-import pandas as pd
 import pdfkit
 import platform
-from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, make_response, current_app, session
 from extensions import db
 from accounts.models import User
 from accounts.decorators import login_required, role_required
 from payroll.models import PayrollRecord
+from payroll.runs import process_month
+from payroll.importer import import_payroll_sheet, error_sheet
 from datetime import datetime
 
 payroll_bp = Blueprint("payroll", __name__, url_prefix="/payroll")
@@ -84,29 +85,13 @@ def generate_salary(user_id):
 @login_required
 @role_required("hr")
 def process_all_salaries():
-    employees = User.query.filter_by(role='employee').all()
     target_month = request.form.get('month')
+    if not target_month:
+        flash("Please pick a month to process.", "danger")
+        return redirect(url_for('payroll.manage_payroll'))
 
-    skipped = 0
-    added = 0
-
-    for emp in employees:
-        # Strict check before adding
-        existing = PayrollRecord.query.filter_by(user_id=emp.id, month=target_month).first()
-        if not existing:
-            basic, allow = 5000.0, 500.0
-            deduct = basic * 0.17
-            new_record = PayrollRecord(
-                user_id=emp.id, month=target_month,
-                basic_salary=basic, allowances=allow,
-                deductions=deduct, net_salary=basic + allow - deduct,
-                status="Processed"
-            )
-            db.session.add(new_record)
-            added += 1
-        else:
-            skipped += 1
-    
+    # One set-based statement; existing slips for the month are left untouched
+    added, skipped = process_month(target_month)
     db.session.commit()
     flash(f"Processed: {added} | Skipped Duplicates: {skipped} for {target_month}", "success")
     return redirect(url_for('payroll.manage_payroll', month=target_month))
@@ -131,45 +116,36 @@ def import_payroll():
         flash('Please select a valid Excel file', 'error')
         return redirect(url_for('payroll.manage_payroll'))
 
+    month = request.form.get('month') or datetime.now().strftime("%B %Y")
     try:
-        if file.filename.endswith('.xlsx') or file.filename.endswith('.xls'):
-            df = pd.read_excel(file)
-        else:
-            df = pd.read_csv(file)
-
-        df.columns = [c.lower().strip() for c in df.columns]
-
-        for _, row in df.iterrows():
-            email = str(row.get('email', '')).strip()
-            user = User.query.filter_by(email=email).first()
-            
-            if user:
-                basic = float(row.get('basic_salary', 0))
-                allow = float(row.get('allowances', 0))
-                deduct = float(row.get('deductions', 0))
-                net = basic + allow - deduct
-                
-                current_month = datetime.now().strftime("%B 2026")
-                record = PayrollRecord.query.filter_by(user_id=user.id, month=current_month).first()
-                
-                if not record:
-                    record = PayrollRecord(user_id=user.id, month=current_month)
-                
-                record.basic_salary = basic
-                record.allowances = allow
-                record.deductions = deduct
-                record.net_salary = net
-                record.status = "Processed"
-                db.session.add(record)
-        
-        db.session.commit()
-        flash('Excel Payroll imported successfully!', 'success')
-        
+        stats, error_token = import_payroll_sheet(file, file.filename, month)
     except Exception as e:
         db.session.rollback()
         flash(f'Import Error: {str(e)}', 'error')
+        return redirect(url_for('payroll.manage_payroll', month=month))
+
+    session['payroll_import_errors'] = error_token
+    flash(f"Imported {stats['imported']} of {stats['rows']} rows for {month}: "
+          f"{stats['added']} added, {stats['updated']} updated.", 'success')
+    if stats['duplicates']:
+        flash(f"{stats['duplicates']} employee(s) were listed more than once; the last row was used.", 'info')
+    if error_token:
+        flash(f"{stats['errors']} row(s) were skipped. Download the error sheet to fix and re-upload them.", 'danger')
+    return redirect(url_for('payroll.manage_payroll', month=month))
 
-    return redirect(url_for('payroll.manage_payroll'))
+@payroll_bp.route('/import-errors')
+@login_required
+@role_required("hr")
+def download_import_errors():
+    """Rows the last import skipped, with the reason, as a CSV HR can fix and re-upload."""
+    sheet = error_sheet(session.get('payroll_import_errors'))
+    if sheet is None:
+        flash('No import errors to download.', 'info')
+        return redirect(url_for('payroll.manage_payroll'))
+    output = make_response(sheet.content)
+    output.headers["Content-Disposition"] = "attachment; filename=payroll_import_errors.csv"
+    output.headers["Content-type"] = "text/csv"
+    return output
 
 @payroll_bp.route("/export-csv")
 @login_required
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import func, literal, select
+
+from extensions import db
+from db_utils import insert_ignore
+from accounts.models import User
+from payroll.models import PayrollRecord
+
+# Flat salary structure for a bulk run; individual slips are edited via payroll.generate_salary
+BASIC_SALARY = 5000.0
+ALLOWANCES = 500.0
+DEDUCTION_RATE = 0.17
+
+
+def process_month(month):
+    """
+    Creates the month's slip for every employee who does not have one yet,
+    as one INSERT ... SELECT over users that skips existing (user_id, month)
+    pairs via _user_month_uc. Runs in the caller's transaction; the caller
+    commits. Returns (added, skipped).
+    """
+    deduct = BASIC_SALARY * DEDUCTION_RATE
+    employees = select(User.id).where(User.role == 'employee')
+
+    source = employees.add_columns(
+        literal(month), literal(BASIC_SALARY), literal(ALLOWANCES), literal(deduct),
+        literal(BASIC_SALARY + ALLOWANCES - deduct), literal("Processed"), literal(datetime.utcnow()),
+    )
+    result = db.session.execute(
+        insert_ignore(PayrollRecord, ["user_id", "month"]).from_select(
+            ["user_id", "month", "basic_salary", "allowances", "deductions", "net_salary", "status", "generated_at"],
+            source,
+        )
+    )
+    total = db.session.execute(select(func.count()).select_from(employees.subquery())).scalar()
+    added = max(result.rowcount, 0)
+    return added, total - added
@@ -1,4 +1,5 @@
 from extensions import db
+from accounts.models import DashboardCounters
 from datetime import date, datetime
 
 
@@ -39,10 +40,31 @@ class Notification(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user = db.Column(db.String(120))      # email of user
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
     message = db.Column(db.String(255))
     is_read = db.Column(db.Boolean, default=False)
 
     created_on = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_notifications_user_read', 'user_id', 'is_read'),
+    )
+
+    @classmethod
+    def notify(cls, user_id, email, message):
+        """Queues a notification and bumps the recipient's unread counter; the caller commits."""
+        notification = cls(user_id=user_id, user=email, message=message)
+        db.session.add(notification)
+        DashboardCounters.bump(user_id, unread_notifications=1)
+        return notification
+
+    @classmethod
+    def mark_all_read(cls, user_id):
+        """Marks every unread notification for the user as read; the caller commits."""
+        marked = cls.query.filter_by(user_id=user_id, is_read=False).update({"is_read": True}, synchronize_session=False)
+        if marked:
+            DashboardCounters.bump(user_id, unread_notifications=-marked)
+        return marked
+
     def __repr__(self):
         return f"<Notification {self.id}>"
@@ -0,0 +1,7 @@
+from app import app
+from accounts.counters import rebuild_dashboard_counters
+
+# Run once after deploying dashboard_counters, or after fixing source rows by hand
+if __name__ == "__main__":
+    with app.app_context():
+        print(f"Rebuilt dashboard counters for {rebuild_dashboard_counters()} user(s). ✅")
@@ -0,0 +1,7 @@
+from app import app
+from grievances.stats import rebuild_grievance_stats
+
+# Run once after deploying grievance_daily_stats to seed history, or after fixing grievances by hand
+if __name__ == "__main__":
+    with app.app_context():
+        print(f"Rebuilt {rebuild_grievance_stats()} grievance category-day row(s). ✅")
@@ -0,0 +1,19 @@
+import argparse
+from datetime import datetime
+from app import app
+from attendance.rollups import rebuild_rollups
+
+
+def parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild attendance rollups from raw punches.")
+    parser.add_argument("--start", type=parse_day, required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_day, default=datetime.now().date(), help="YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        days, user_months = rebuild_rollups(args.start, args.end)
+        print(f"Rebuilt {days} day(s) and {user_months} employee-month(s). ✅")
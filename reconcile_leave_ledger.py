@@ -0,0 +1,13 @@
+import argparse
+from app import app
+from leaves.ledger import reconcile_ledger
+
+# Rebuilds leave_balances from the leaves history; safe to re-run at any time
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the leave balance ledger from leave history.")
+    parser.add_argument("--year", type=int, action="append", help="limit to this year (repeatable); default: all")
+    args = parser.parse_args()
+
+    with app.app_context():
+        rows = reconcile_ledger(args.year)
+        print(f"Reconciled {rows} ledger row(s). ✅")
@@ -1,45 +1,23 @@
 from flask import Blueprint, render_template, session, request
 from grievances.models import Grievance
-from leaves.models import LeaveRequest
+from leaves.models import LeaveRequest, LeaveBalance
 from accounts.decorators import login_required, role_required
-from attendance.models import Attendance
+from attendance.models import AttendanceDaily, AttendanceUserMonthly
+from attendance.queries import read_filters, attendance_page, calculate_hms
 from planner.models import CalendarEvent
-from sqlalchemy import func
 from extensions import db
 from datetime import datetime, timedelta
 import pytz
 import csv
 import io
-from accounts.models import EmployeeProfile
+from accounts.models import EmployeeProfile, User
+from grievances.stats import sla_report, AGING_BUCKETS
 from flask import Response
 
 reports_bp = Blueprint("reports", __name__, url_prefix="/reports")
 
 IST = pytz.timezone('Asia/Kolkata')
 
-def calculate_hms(dt_in, dt_out):
-    """Utility to calculate duration safely between two datetimes."""
-    if not dt_in or not dt_out:
-        return "N/A"
-    
-    # Ensure naive comparison to prevent tzinfo errors
-    naive_in = dt_in.replace(tzinfo=None) if hasattr(dt_in, 'tzinfo') and dt_in.tzinfo else dt_in
-    naive_out = dt_out.replace(tzinfo=None) if hasattr(dt_out, 'tzinfo') and dt_out.tzinfo else dt_out
-    
-    # Check if either is a timedelta (Residual TIME columns)
-    if isinstance(naive_in, timedelta) or isinstance(naive_out, timedelta):
-        return "Time Format Error"
-
-    diff = naive_out - naive_in
-    total_seconds = int(diff.total_seconds())
-    
-    if total_seconds < 0:
-        return "0h 0m 0s"
-        
-    hours, remainder = divmod(total_seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    return f"{hours}h {minutes}m {seconds}s"
-
 @reports_bp.route("/")
 @login_required
 def index():
@@ -57,54 +35,59 @@ def index():
 @login_required
 @role_required('hr')
 def attendance_report():
-    """Detailed view of every attendance log with formatted times and durations."""
-    all_logs = Attendance.query.order_by(Attendance.date.desc()).all()
-    now_ist = datetime.now(IST)
-    now_naive = now_ist.replace(tzinfo=None)
-
-    for log in all_logs:
-        # Format Clock In: Handles residual timedeltas or datetimes
-        if log.clock_in:
-            if isinstance(log.clock_in, timedelta):
-                dt_in = datetime.combine(log.date, (datetime.min + log.clock_in).time())
-            else:
-                dt_in = log.clock_in.replace(tzinfo=None) if log.clock_in.tzinfo else log.clock_in
-            log.formatted_in = dt_in.strftime('%I:%M %p')
-        else:
-            dt_in = None
-            log.formatted_in = "N/A"
-
-        # Format Clock Out
-        if log.clock_out:
-            if isinstance(log.clock_out, timedelta):
-                dt_out = datetime.combine(log.date, (datetime.min + log.clock_out).time())
-            else:
-                dt_out = log.clock_out.replace(tzinfo=None) if log.clock_out.tzinfo else log.clock_out
-            log.formatted_out = dt_out.strftime('%I:%M %p')
-        else:
-            # Handle Active shifts for the duration timer
-            dt_out = now_naive if log.date == now_ist.date() else None
-            log.formatted_out = "Active" if dt_out else "Missed"
-
-        # Safe Duration calculation for the template
-        if dt_in and dt_out:
-            log.display_duration = calculate_hms(dt_in, dt_out)
-        else:
-            log.display_duration = "N/A"
-
-    return render_template('reports/attendance_detailed.html', logs=all_logs)
+    """Detailed view of attendance logs with formatted times and durations, one keyset page at a time."""
+    filters = read_filters(request.args)
+    all_logs, next_cursor = attendance_page(filters, cursor=request.args.get('cursor'))
+    return render_template('reports/attendance_detailed.html', logs=all_logs, filters=filters, next_cursor=next_cursor)
 
 @reports_bp.route('/attendance-summary')
 @login_required
 @role_required('hr')
 def attendance_detailed():
-    """Summary view grouped by date."""
-    report_data = db.session.query(
-        Attendance.date, 
-        func.count(Attendance.id).label('total_employees')
-    ).group_by(Attendance.date).order_by(Attendance.date.desc()).all()
-
-    return render_template('reports/attendance_summary.html', data=report_data)
+    """Summary view grouped by date, read from the precomputed rollups."""
+    today = datetime.now(IST).date()
+    filters = read_filters(request.args)
+    start = filters["start"] or today - timedelta(days=90)
+    end = filters["end"] or today
+
+    report_data = AttendanceDaily.query.filter(
+        AttendanceDaily.date >= start, AttendanceDaily.date <= end
+    ).order_by(AttendanceDaily.date.desc()).all()
+
+    # Per-employee totals for the month the range ends in
+    employee_data = db.session.query(AttendanceUserMonthly, User.email).join(
+        User, User.id == AttendanceUserMonthly.user_id
+    ).filter(AttendanceUserMonthly.month == end.replace(day=1)).order_by(User.email).all()
+
+    return render_template(
+        'reports/attendance_summary.html',
+        data=report_data,
+        employee_data=employee_data,
+        start=start,
+        end=end,
+        today=today
+    )
+
+@reports_bp.route('/leave-summary')
+@login_required
+@role_required('hr')
+def leave_summary():
+    """Per-employee leave ledger for one year; the ledger already holds working days."""
+    year = request.args.get('year', type=int) or datetime.now(IST).year
+    rows = db.session.query(LeaveBalance, User.email).join(
+        User, User.id == LeaveBalance.user_id
+    ).filter(LeaveBalance.year == year).order_by(User.email, LeaveBalance.leave_type).all()
+    return render_template('reports/leave_summary.html', rows=rows, year=year)
+
+@reports_bp.route('/grievance-sla')
+@login_required
+@role_required('hr')
+def grievance_sla():
+    """Open-ticket aging and time to resolution per category, read from grievance_daily_stats."""
+    window = min(max(request.args.get('days', 30, type=int), 1), 365)
+    rows = sla_report(datetime.now(IST).date(), window_days=window)
+    return render_template('reports/grievance_sla.html', rows=rows, window=window,
+                           buckets=[label for label, _, _ in AGING_BUCKETS])
 
 @reports_bp.route('/break_report')
 @login_required
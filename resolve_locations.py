@@ -0,0 +1,10 @@
+from app import app
+from attendance.tasks import resolve_pending_locations
+
+# Cron-friendly sweep: geocodes attendance rows still holding raw "Lat: X, Lon: Y"
+# strings, e.g. when a worker restarted before its background job ran.
+if __name__ == "__main__":
+    app.config['GEOCODE_ASYNC'] = False
+    with app.app_context():
+        count = resolve_pending_locations()
+        print(f"Resolved {count} pending location(s). ✅")
@@ -0,0 +1,14 @@
+import argparse
+from datetime import datetime, timedelta
+from app import app
+from attendance.geofence import retag_sites
+
+# Run after editing the GEOFENCES file so recent clock-ins pick up the new office boundaries
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-tag recent clock-ins with their office geofence.")
+    parser.add_argument("--days", type=int, default=30, help="how far back to re-tag (default: 30)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        since = datetime.now().date() - timedelta(days=args.days)
+        print(f"Retagged {retag_sites(since)} clock-in(s) since {since}. ✅")